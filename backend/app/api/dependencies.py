@@ -1,35 +1,102 @@
-from fastapi import Depends, HTTPException, status
+import time
+from typing import Optional
+from fastapi import Depends, HTTPException, Query, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from app.core.security import decode_token
-from app.services.user_service import user_service
+from app.core.cache import user_cache, token_cache
+from app.core.revocation import revocation_list
+from app.services.bill_service import BillService, bill_service
+from app.services.invoice_service import InvoiceService, invoice_service
+from app.services.stats_service import StatsService, stats_service
+from app.services.task_history import TaskHistoryService, task_history
+from app.services.task_service import TaskService, task_service
+from app.services.user_service import UserService, user_service
 from app.schemas.user import TokenData
 
 security = HTTPBearer()
+optional_security = HTTPBearer(auto_error=False)
+
+credentials_exception = HTTPException(
+    status_code=status.HTTP_401_UNAUTHORIZED,
+    detail="Could not validate credentials",
+    headers={"WWW-Authenticate": "Bearer"},
+)
+
+
+# Service providers: routes receive services through Depends, so tests and
+# alternative deployments can swap them with app.dependency_overrides. The
+# services resolve their collections per call, so none of them touches the
+# database before the lifespan has connected.
+
+def get_user_service() -> UserService:
+    return user_service
+
+
+def get_bill_service() -> BillService:
+    return bill_service
+
+
+def get_invoice_service() -> InvoiceService:
+    return invoice_service
+
+
+def get_task_service() -> TaskService:
+    return task_service
+
+
+def get_stats_service() -> StatsService:
+    return stats_service
+
+
+def get_task_history_service() -> TaskHistoryService:
+    return task_history
 
 
 async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """Get current authenticated user"""
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    return await authenticate_token(credentials.credentials)
+
 
-    token = credentials.credentials
-    payload = decode_token(token)
+async def get_token_payload(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
+    """Claims of the current bearer access token (sub, role, jti, sid, exp)"""
+    return await verify_access_token(credentials.credentials)
+
+
+async def verify_access_token(token: str) -> dict:
+    """Decode an access token and make sure neither it nor its session was revoked"""
+    payload = token_cache.get(token)
 
     if payload is None:
+        payload = decode_token(token)
+        if payload is None:
+            raise credentials_exception
+        # Never keep a payload cached past the token's own expiry
+        expires_in = payload["exp"] - time.time() if "exp" in payload else None
+        token_cache.set(token, payload, ttl=expires_in)
+
+    # In memory unless the Bloom filter reports a possible match
+    if await revocation_list.is_revoked(payload.get("jti"), payload.get("sid")):
         raise credentials_exception
+    return payload
+
+
+async def authenticate_token(token: str) -> dict:
+    """Resolve a bearer token to its user document"""
+    payload = await verify_access_token(token)
 
     mobile: str = payload.get("sub")
     if mobile is None:
         raise credentials_exception
 
-    user = user_service.get_user_by_mobile(mobile)
+    user = user_cache.get(mobile)
     if user is None:
-        raise credentials_exception
+        user = await user_service.get_user_by_mobile(mobile)
+        if user is None:
+            raise credentials_exception
+        user_cache.set(mobile, user)
 
-    return user
+    # Routes may mutate the returned document, so hand out a copy
+    return dict(user)
 
 
 async def get_current_customer(current_user: dict = Depends(get_current_user)) -> dict:
@@ -50,3 +117,15 @@ async def get_current_engineer(current_user: dict = Depends(get_current_user)) -
             detail="Not authorized. Engineer role required."
         )
     return current_user
+
+
+async def get_stream_engineer(
+    token: Optional[str] = Query(None, description="Access token, for clients such as EventSource that cannot set headers"),
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security)
+) -> dict:
+    """Get current engineer for streaming endpoints, accepting the token as a header or query parameter"""
+    if credentials is not None:
+        token = credentials.credentials
+    if not token:
+        raise credentials_exception
+    return await get_current_engineer(await authenticate_token(token))
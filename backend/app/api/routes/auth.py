@@ -1,19 +1,22 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from datetime import timedelta
-from app.schemas.user import UserCreate, UserLogin, Token, UserResponse
-from app.services.user_service import user_service
-from app.core.security import create_access_token
+import math
+from fastapi import APIRouter, HTTPException, status, Depends, Request, Response
+from datetime import datetime, timedelta
+from app.schemas.user import UserCreate, UserLogin, Token, UserResponse, RefreshTokenRequest
+from app.services.user_service import UserService
+from app.core.security import create_token_pair, decode_token
+from app.core.rate_limit import client_ip, login_guard
+from app.core.revocation import revocation_list
 from app.core.config import settings
-from app.api.dependencies import get_current_user
+from app.api.dependencies import credentials_exception, get_current_user, get_token_payload, get_user_service
 
 router = APIRouter()
 
 
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate):
+async def register(user_data: UserCreate, user_service: UserService = Depends(get_user_service)):
     """Register a new user"""
     try:
-        user = user_service.create_user(user_data)
+        user = await user_service.create_user(user_data)
         # Remove sensitive data
         user.pop("hashed_password", None)
         return user
@@ -25,35 +28,101 @@ async def register(user_data: UserCreate):
 
 
 @router.post("/login", response_model=Token)
-async def login(login_data: UserLogin):
-    """Login user and return JWT token"""
-    user = user_service.authenticate_user(
+async def login(
+    login_data: UserLogin,
+    request: Request,
+    user_service: UserService = Depends(get_user_service)
+):
+    """Login user and return JWT token
+
+    Throttled attempts get 429 with Retry-After before any user lookup or
+    password check.
+    """
+    ip = client_ip(request)
+    retry_after = await login_guard.check(login_data.mobile, ip)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, please try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+    user = await user_service.authenticate_user(
         login_data.mobile,
         login_data.password,
         login_data.role
     )
 
     if not user:
+        await login_guard.record_failure(login_data.mobile, ip)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect mobile number, password, or role",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"sub": user["mobile"], "role": user["role"]},
-        expires_delta=access_token_expires
-    )
+    await login_guard.record_success(login_data.mobile, ip)
 
     # Remove sensitive data
     user.pop("hashed_password", None)
 
-    return {
-        "access_token": access_token,
-        "token_type": "bearer",
-        "user": user
-    }
+    return {**create_token_pair(user["mobile"], user["role"]), "user": user}
+
+
+@router.post("/refresh", response_model=Token)
+async def refresh(refresh_data: RefreshTokenRequest, user_service: UserService = Depends(get_user_service)):
+    """Exchange a refresh token for a new access and refresh token
+
+    Each refresh token works once. Presenting one that was already used means
+    it leaked, so the whole session is revoked.
+    """
+    payload = decode_token(refresh_data.refresh_token, token_type="refresh")
+    if payload is None or "jti" not in payload:
+        raise credentials_exception
+    session_expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+    # Refreshes are rare, so check MongoDB rather than this worker's possibly stale filter
+    if await revocation_list.is_revoked_in_db(payload["sid"]):
+        raise credentials_exception
+    if not await revocation_list.use_refresh_token(payload["jti"], datetime.utcfromtimestamp(payload["exp"])):
+        await revocation_list.revoke(payload["sid"], session_expires_at)
+        raise credentials_exception
+
+    user = await user_service.get_user_by_mobile(payload["sub"])
+    if user is None:
+        raise credentials_exception
+    user.pop("hashed_password", None)
+    return {**create_token_pair(user["mobile"], user["role"], session_id=payload["sid"]), "user": user}
+
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+async def logout(payload: dict = Depends(get_token_payload)):
+    """End the current session: its access token and refresh token stop working"""
+    if payload.get("sid"):
+        # A session lives as long as its newest refresh token
+        await revocation_list.revoke(payload["sid"], datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+    elif payload.get("jti"):
+        await revocation_list.revoke(payload["jti"], datetime.utcfromtimestamp(payload["exp"]))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.post("/revoke", status_code=status.HTTP_204_NO_CONTENT)
+async def revoke(refresh_data: RefreshTokenRequest, current_user: dict = Depends(get_current_user)):
+    """End another session of the current user (e.g. a lost device) given its refresh token"""
+    payload = decode_token(refresh_data.refresh_token, token_type="refresh")
+    if payload is None or "sid" not in payload:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid refresh token"
+        )
+    if payload["sub"] != current_user["mobile"]:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not authorized to revoke this session"
+        )
+    # The lost device may have refreshed since; cover the longest a session can last
+    await revocation_list.revoke(payload["sid"], datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS))
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get("/me", response_model=UserResponse)
@@ -1,23 +1,103 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from app.schemas.bill import BillResponse, BillCreate
-from app.services.bill_service import bill_service
-from app.api.dependencies import get_current_customer
+import asyncio
+import csv
+import io
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from typing import AsyncIterator, List, Literal, Optional
+from app.core.config import settings
+from app.core.idempotency import idempotency_store
+from app.core.response_cache import cached_response
+from app.core.responses import file_response, model_list_response, model_response
+from app.core.versions import bills_version_key
+from app.schemas.bill import BillBatchRequest, BillBatchResult, BillResponse, BillCreate
+from app.services.bill_service import BillService
+from app.services.invoice_service import InvoiceService
+from app.api.dependencies import get_current_customer, get_current_engineer, get_bill_service, get_invoice_service
 
 router = APIRouter()
 
+bill_list_adapter = TypeAdapter(List[BillResponse])
+
 
 @router.get("", response_model=List[BillResponse])
-async def get_bills(current_user: dict = Depends(get_current_customer)):
-    """Get all bills for current customer"""
-    bills = bill_service.get_bills_by_user(current_user["id"])
-    return bills
+async def get_bills(
+    request: Request,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_customer),
+    bill_service: BillService = Depends(get_bill_service)
+):
+    """Get the current customer's bills newest first, one page at a time
 
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    Responses carry an ETag; send it back in If-None-Match to get 304 when
+    none of the customer's bills have changed.
+    """
+    async def render():
+        try:
+            bills, next_cursor = await bill_service.get_bills_page(current_user["id"], limit=limit, cursor=cursor)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return model_list_response(bill_list_adapter, bills, headers)
+
+    return await cached_response(request, bills_version_key(current_user["id"]), render)
+
+
+async def _ndjson_lines(bills: AsyncIterator[dict]) -> AsyncIterator[str]:
+    async for bill in bills:
+        yield BillResponse.model_validate(bill).model_dump_json() + "\n"
+
+
+async def _csv_lines(bills: AsyncIterator[dict]) -> AsyncIterator[str]:
+    columns = list(BillResponse.model_fields)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for bill in bills:
+        row = BillResponse.model_validate(bill).model_dump(mode="json")
+        writer.writerow([row[column] for column in columns])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
 
-@router.patch("/{bill_id}/pay", response_model=BillResponse)
-async def pay_bill(bill_id: str, current_user: dict = Depends(get_current_customer)):
-    """Pay a bill (mark as Paid)"""
-    bill = bill_service.get_bill_by_id(bill_id)
+
+@router.get("/export")
+async def export_bills(
+    format: Literal["ndjson", "csv"] = "ndjson",
+    current_user: dict = Depends(get_current_customer),
+    bill_service: BillService = Depends(get_bill_service)
+):
+    """Stream the current customer's full bill history as NDJSON or CSV"""
+    bills = bill_service.iter_bills_by_user(current_user["id"], batch_size=settings.EXPORT_BATCH_SIZE)
+    if format == "csv":
+        return StreamingResponse(
+            _csv_lines(bills),
+            media_type="text/csv",
+            headers={"Content-Disposition": 'attachment; filename="bills.csv"'}
+        )
+    return StreamingResponse(_ndjson_lines(bills), media_type="application/x-ndjson")
+
+
+@router.get("/{bill_id}/pdf")
+async def download_invoice(
+    bill_id: str,
+    request: Request,
+    current_user: dict = Depends(get_current_customer),
+    bill_service: BillService = Depends(get_bill_service),
+    invoice_service: InvoiceService = Depends(get_invoice_service)
+):
+    """Download a bill's invoice PDF
+
+    Served from the invoice cache when possible, with an ETag and support for
+    Range requests so interrupted downloads can resume.
+    """
+    bill = await bill_service.get_bill_by_id(bill_id)
 
     if not bill:
         raise HTTPException(
@@ -29,15 +109,98 @@ async def pay_bill(bill_id: str, current_user: dict = Depends(get_current_custom
     if bill["user_id"] != current_user["id"]:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not authorized to pay this bill"
+            detail="Not authorized to view this bill"
         )
 
-    updated_bill = bill_service.update_bill_status(bill_id, "Paid")
-    return updated_bill
+    # The cache may evict the file between lookup and open; one retry re-renders it
+    for attempt in range(2):
+        path, key = await invoice_service.get_invoice(bill, current_user)
+        try:
+            file = await asyncio.to_thread(open, path, "rb")
+            break
+        except FileNotFoundError:
+            if attempt:
+                raise
+
+    return file_response(
+        request,
+        file,
+        media_type="application/pdf",
+        etag=f'"{key}"',
+        headers={
+            "Content-Disposition": f'attachment; filename="{bill["pdf_filename"]}"',
+            "Cache-Control": "private, no-cache"
+        }
+    )
+
+
+@router.patch("/{bill_id}/pay", response_model=BillResponse)
+async def pay_bill(
+    bill_id: str,
+    request: Request,
+    idempotency_key: Optional[str] = Header(None),
+    current_user: dict = Depends(get_current_customer),
+    bill_service: BillService = Depends(get_bill_service)
+):
+    """Pay a bill (mark as Paid)
+
+    The payment is one conditional update, so double taps cannot both apply.
+    Retries sent with the same Idempotency-Key replay the first response.
+    """
+    async def render():
+        bill = await bill_service.pay_bill(bill_id, current_user["id"])
+        if bill:
+            return model_response(BillResponse, bill)
+
+        # Nothing was updated; one extra read explains why
+        bill = await bill_service.get_bill_by_id(bill_id)
+        if not bill:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Bill not found"
+            )
+
+        # Verify bill belongs to current user
+        if bill["user_id"] != current_user["id"]:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not authorized to pay this bill"
+            )
+
+        # Already paid: return it unchanged
+        return model_response(BillResponse, bill)
+
+    return await idempotency_store.run(request, f"pay_bill:{current_user['id']}", idempotency_key, render)
 
 
 @router.post("", response_model=BillResponse, status_code=status.HTTP_201_CREATED)
-async def create_bill(bill_data: BillCreate):
+async def create_bill(bill_data: BillCreate, bill_service: BillService = Depends(get_bill_service)):
     """Create a new bill (for testing purposes)"""
-    bill = bill_service.create_bill(bill_data)
-    return bill
+    try:
+        bill = await bill_service.create_bill(bill_data)
+        return bill
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.post("/batch", response_model=List[BillBatchResult])
+async def batch_bills(
+    batch: BillBatchRequest,
+    current_user: dict = Depends(get_current_engineer),
+    bill_service: BillService = Depends(get_bill_service)
+):
+    """Create bills and update bill statuses in one request (back office, Engineer only)
+
+    Operations look like {"op": "create", ...bill fields} or
+    {"op": "update", "bill_id": ..., "status": ...}; results are per operation.
+    """
+    try:
+        return await bill_service.run_batch(batch.operations)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
@@ -0,0 +1,15 @@
+from fastapi import APIRouter, Depends
+from app.schemas.stats import DashboardStats
+from app.services.stats_service import StatsService
+from app.api.dependencies import get_current_engineer, get_stats_service
+
+router = APIRouter()
+
+
+@router.get("", response_model=DashboardStats)
+async def get_stats(
+    current_user: dict = Depends(get_current_engineer),
+    stats_service: StatsService = Depends(get_stats_service)
+):
+    """Task counts by status and outstanding billing summary (Engineer only)"""
+    return await stats_service.get_dashboard()
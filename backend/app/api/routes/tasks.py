@@ -1,24 +1,196 @@
-from fastapi import APIRouter, HTTPException, status, Depends
-from typing import List
-from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
-from app.services.task_service import task_service
-from app.api.dependencies import get_current_engineer
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, status, Depends, Header, Query, Request, UploadFile, File
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from typing import List, Literal, Optional
+from app.core.config import settings
+from app.core.response_cache import cached_response
+from app.core.responses import documents_response, model_list_response
+from app.core.versions import TASKS_VERSION_KEY
+from app.schemas.task import (
+    TaskBatchRequest, TaskBatchResult, TaskCreate, TaskImportResult, TaskLeadTimes, TaskResponse, TaskTimeline, TaskUpdate
+)
+from app.services.task_service import TaskService
+from app.services.task_events import task_event_bus
+from app.services.task_history import TaskHistoryService
+from app.api.dependencies import get_current_engineer, get_stream_engineer, get_task_history_service, get_task_service
 
 router = APIRouter()
 
+task_list_adapter = TypeAdapter(List[TaskResponse])
+
 
 @router.get("", response_model=List[TaskResponse])
-async def get_tasks(current_user: dict = Depends(get_current_engineer)):
-    """Get all installation tasks (Engineer only)"""
-    tasks = task_service.get_all_tasks()
-    return tasks
+async def get_tasks(
+    request: Request,
+    status_filter: Optional[Literal["Pending Installation", "Installation Scheduled", "Completed"]] = Query(None, alias="status"),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+    current_user: dict = Depends(get_current_engineer),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """Get installation tasks newest first, one page at a time (Engineer only)
+
+    The cursor for the next page is returned in the X-Next-Cursor header.
+    Responses carry an ETag; send it back in If-None-Match to get 304 when
+    no task has changed.
+    """
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+
+    async def render():
+        try:
+            tasks, next_cursor = await task_service.get_tasks_page(
+                status=status_filter,
+                limit=limit,
+                cursor=cursor,
+                fields=field_list
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        if field_list:
+            # Partial documents would fail TaskResponse validation
+            return documents_response(tasks, headers)
+        return model_list_response(task_list_adapter, tasks, headers)
+
+    return await cached_response(request, TASKS_VERSION_KEY, render)
+
+
+@router.get("/search", response_model=List[TaskResponse])
+async def search_tasks(
+    request: Request,
+    q: Optional[str] = Query(None, min_length=1, max_length=100, description="Whole words to match in the name or address"),
+    mobile: Optional[str] = Query(None, pattern=r"^\d{1,10}$", description="Mobile number prefix"),
+    status_filter: Optional[Literal["Pending Installation", "Installation Scheduled", "Completed"]] = Query(None, alias="status"),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_engineer),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """Search installation tasks by name/address words and mobile prefix (Engineer only)
+
+    Word searches come best match first, mobile-prefix searches in mobile
+    number order. Paginated with X-Next-Cursor and cached like GET /api/tasks.
+    """
+    async def render():
+        try:
+            tasks, next_cursor = await task_service.search_tasks(
+                text=q,
+                mobile_prefix=mobile,
+                status=status_filter,
+                limit=limit,
+                cursor=cursor
+            )
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=str(e)
+            )
+
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return model_list_response(task_list_adapter, tasks, headers)
+
+    return await cached_response(request, TASKS_VERSION_KEY, render)
+
+
+@router.get("/timelines", response_model=List[TaskTimeline])
+async def get_task_timelines(
+    task_id: List[str] = Query(..., max_length=settings.PAGE_SIZE_MAX, description="Repeat for each task"),
+    current_user: dict = Depends(get_current_engineer),
+    task_history_service: TaskHistoryService = Depends(get_task_history_service)
+):
+    """Status history and time to completion of each requested task (Engineer only)
+
+    History is written in the background, so the latest change can take up to
+    TASK_HISTORY_FLUSH_INTERVAL_SECONDS to appear.
+    """
+    try:
+        return await task_history_service.get_timelines(task_id)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/lead-times", response_model=TaskLeadTimes)
+async def get_task_lead_times(
+    from_status: Literal["Pending Installation", "Installation Scheduled", "Completed"] = "Pending Installation",
+    to_status: Literal["Pending Installation", "Installation Scheduled", "Completed"] = "Completed",
+    since_days: int = Query(90, ge=1, le=3650),
+    current_user: dict = Depends(get_current_engineer),
+    task_history_service: TaskHistoryService = Depends(get_task_history_service)
+):
+    """Installation lead-time percentiles over tasks started in the last since_days (Engineer only)"""
+    try:
+        return await task_history_service.get_lead_times(from_status, to_status, since_days)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/events")
+async def task_events(
+    request: Request,
+    last_event_id: Optional[str] = Header(None),
+    current_user: dict = Depends(get_stream_engineer)
+):
+    """Server-sent events for task creation and status changes (Engineer only)
+
+    Reconnecting clients send the last seen id in Last-Event-ID and receive
+    only the events they missed. If those can no longer be replayed, a
+    "reset" event tells the client to refetch GET /api/tasks.
+    """
+    queue, backlog, reset = task_event_bus.subscribe(last_event_id)
+
+    def format_event(event) -> str:
+        return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data)}\n\n"
+
+    async def stream():
+        try:
+            if reset:
+                yield "event: reset\ndata: {}\n\n"
+            for event in backlog:
+                yield format_event(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=settings.SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    # Shutting down, or this client fell too far behind; it will reconnect
+                    break
+                yield format_event(event)
+        finally:
+            task_event_bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.post("", response_model=TaskResponse, status_code=status.HTTP_201_CREATED)
-async def create_task(task_data: TaskCreate, current_user: dict = Depends(get_current_engineer)):
+async def create_task(
+    task_data: TaskCreate,
+    current_user: dict = Depends(get_current_engineer),
+    task_service: TaskService = Depends(get_task_service)
+):
     """Create a new installation task (Engineer only)"""
     try:
-        task = task_service.create_task(task_data)
+        task = await task_service.create_task(task_data)
         return task
     except Exception as e:
         raise HTTPException(
@@ -27,14 +199,73 @@ async def create_task(task_data: TaskCreate, current_user: dict = Depends(get_cu
         )
 
 
+@router.post("/import", response_model=List[TaskImportResult])
+async def import_tasks(
+    file: UploadFile = File(..., description="CSV with a header row, or a JSON array of tasks"),
+    current_user: dict = Depends(get_current_engineer),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """Bulk import installation tasks from a CSV or JSON upload (Engineer only)
+
+    Uploads are capped at IMPORT_MAX_UPLOAD_BYTES and IMPORT_MAX_ROWS_PER_REQUEST
+    rows; larger files are imported with `python manage.py tasks import`.
+    """
+    # Read at most one byte past the cap, so an oversized upload is never buffered or parsed whole
+    content = await file.read(settings.IMPORT_MAX_UPLOAD_BYTES + 1)
+    if len(content) > settings.IMPORT_MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"An upload can be at most {settings.IMPORT_MAX_UPLOAD_BYTES} bytes; "
+                   "import larger files with `python manage.py tasks import`"
+        )
+    try:
+        rows = task_service.parse_import_file(content, file.filename or "")
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    if len(rows) > settings.IMPORT_MAX_ROWS_PER_REQUEST:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"An upload can hold at most {settings.IMPORT_MAX_ROWS_PER_REQUEST} rows; "
+                   "import larger files with `python manage.py tasks import`"
+        )
+
+    results = await task_service.import_tasks(rows, batch_size=settings.IMPORT_BATCH_SIZE)
+    return results
+
+
+@router.post("/batch", response_model=List[TaskBatchResult])
+async def batch_tasks(
+    batch: TaskBatchRequest,
+    current_user: dict = Depends(get_current_engineer),
+    task_service: TaskService = Depends(get_task_service)
+):
+    """Create tasks and update task statuses in one request (Engineer only)
+
+    Operations look like {"op": "create", ...task fields} or
+    {"op": "update", "task_id": ..., "status": ...}. Each gets a result, in
+    request order; an invalid operation does not stop the others.
+    """
+    try:
+        return await task_service.run_batch(batch.operations)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
 @router.patch("/{task_id}/status", response_model=TaskResponse)
 async def update_task_status(
     task_id: str,
     task_update: TaskUpdate,
-    current_user: dict = Depends(get_current_engineer)
+    current_user: dict = Depends(get_current_engineer),
+    task_service: TaskService = Depends(get_task_service)
 ):
     """Update task status (Engineer only)"""
-    task = task_service.get_task_by_id(task_id)
+    task = await task_service.get_task_by_id(task_id)
 
     if not task:
         raise HTTPException(
@@ -42,5 +273,5 @@ async def update_task_status(
             detail="Task not found"
         )
 
-    updated_task = task_service.update_task_status(task_id, task_update.status)
+    updated_task = await task_service.update_task_status(task_id, task_update.status)
     return updated_task
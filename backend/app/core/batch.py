@@ -0,0 +1,109 @@
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Set, Tuple
+from bson import ObjectId
+from pydantic import ValidationError
+from pymongo.errors import BulkWriteError
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.config import settings
+
+# Turns an operation's fields (without "op") into a validated value; raises ValueError/TypeError
+Validator = Callable[[dict], Any]
+
+
+def describe_error(error: Exception) -> str:
+    """One-line description of a validation error"""
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}"
+            for detail in error.errors()
+        )
+    return str(error)
+
+
+def parse_object_id(value: Any, field: str) -> ObjectId:
+    try:
+        return ObjectId(value)
+    except Exception:
+        raise ValueError(f"{field}: not a valid id")
+
+
+def validate_operations(
+    operations: List[Any],
+    validators: Dict[str, Validator]
+) -> Tuple[List[dict], List[Tuple[int, str, Any]]]:
+    """Validate each {"op": ..., ...} operation with the validator for its op
+
+    Returns one result per operation, invalid ones already marked with the
+    reason, and the valid ones as (index, op, validated value). Raises
+    ValueError if the batch itself is too large.
+    """
+    if len(operations) > settings.BATCH_MAX_OPERATIONS:
+        raise ValueError(f"A batch can hold at most {settings.BATCH_MAX_OPERATIONS} operations")
+    results: List[dict] = []
+    valid: List[Tuple[int, str, Any]] = []
+    for index, operation in enumerate(operations):
+        op = operation.get("op") if isinstance(operation, dict) else None
+        result = {"index": index, "op": op if op in validators else None}
+        results.append(result)
+        try:
+            if not isinstance(operation, dict):
+                raise ValueError("Operation must be an object")
+            if op not in validators:
+                raise ValueError(f"op must be one of: {', '.join(validators)}")
+            fields = {key: value for key, value in operation.items() if key != "op"}
+            valid.append((index, op, validators[op](fields)))
+        except (ValueError, TypeError) as e:
+            result.update(status="invalid", error=describe_error(e))
+    return results, valid
+
+
+# Reported for an update whose document changed between the read and the write
+CONFLICT_ERROR = "Status changed concurrently; read it again and retry"
+
+
+def batch_marker() -> datetime:
+    """Timestamp stamped as updated_at by a batch's updates, at BSON (millisecond) precision"""
+    now = datetime.utcnow()
+    return now.replace(microsecond=now.microsecond // 1000 * 1000)
+
+
+async def run_bulk_write(
+    collection: AsyncIOMotorCollection,
+    requests: List[Tuple[int, Any]]
+) -> Tuple[int, Dict[int, dict]]:
+    """Run (operation index, write request) pairs as one unordered bulk_write
+
+    Returns how many documents the updates matched and the write errors
+    keyed by operation index.
+    """
+    if not requests:
+        return 0, {}
+    try:
+        result = await collection.bulk_write([request for _, request in requests], ordered=False)
+    except BulkWriteError as e:
+        errors = {requests[error["index"]][0]: error for error in e.details["writeErrors"]}
+        return e.details["nMatched"], errors
+    return result.matched_count, {}
+
+
+async def unapplied_updates(
+    collection: AsyncIOMotorCollection,
+    updates: Dict[int, ObjectId],
+    matched: int,
+    marker: datetime
+) -> Set[int]:
+    """Operation indexes of conditional updates that matched nothing
+
+    Each update is filtered on the status read before the write and sets
+    updated_at to the batch marker. Only when fewer documents matched than
+    updates were sent is one more read needed, to find the documents that
+    lost the race to another writer.
+    """
+    if matched >= len(updates):
+        return set()
+    applied = {
+        document["_id"] async for document in collection.find(
+            {"_id": {"$in": list(updates.values())}, "updated_at": marker}, {"_id": 1}
+        )
+    }
+    return {index for index, document_id in updates.items() if document_id not in applied}
@@ -10,11 +10,109 @@ class Settings(BaseSettings):
     # MongoDB Settings
     MONGODB_URL: str = "mongodb://localhost:27017"
     MONGODB_DB_NAME: str = "4you_broadband"
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 0
+    MONGODB_MAX_CONNECTING: int = 2
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 10000
+    MONGODB_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGODB_CONNECT_TIMEOUT_MS: int = 5000
+    MONGODB_SOCKET_TIMEOUT_MS: int = 30000
+    MONGODB_COMPRESSORS: str = ""  # e.g. "zstd,snappy,zlib"; zstd/snappy need their Python packages
+    MONGODB_WRITE_CONCERN: str = "majority"  # "majority" or a number of nodes
+    MONGODB_WRITE_TIMEOUT_MS: int = 10000
+    MONGODB_READ_PREFERENCE: str = "primary"
+    MONGODB_COLLECTION_READ_PREFERENCES: dict = {}  # e.g. {"tasks": "secondaryPreferred"}
+
+    # Startup Settings
+    ENSURE_INDEXES_ON_STARTUP: bool = True  # turn off when indexes are applied at deploy time
+    STARTUP_WARMUP: bool = False
 
     # Security Settings
     SECRET_KEY: str = "your-secret-key-change-this-in-production"
     ALGORITHM: str = "HS256"
-    ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+
+    # Token Revocation Settings (logout takes effect on other workers within REVOCATION_REFRESH_SECONDS)
+    REVOCATION_REFRESH_SECONDS: float = 5.0
+    REVOCATION_REBUILD_SECONDS: int = 3600
+    REVOCATION_BLOOM_CAPACITY: int = 100000
+    REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    REVOCATION_EXACT_MAX_SIZE: int = 10000
+
+    # Password Hashing Settings
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_USE_PROCESSES: bool = False
+
+    # Billing Settings (monthly plan prices before GST, in rupees)
+    PLAN_MONTHLY_PRICES: dict = {
+        "100 Mbps Standard": 599.00,
+        "300 Mbps Fiber Blast": 999.00,
+        "500 Mbps Pro Gamer": 1499.00,
+        "1 Gbps Premium": 2499.00,
+    }
+    GST_RATE: float = 0.18
+    BILL_DUE_DAY: int = 5
+    BILLING_BATCH_SIZE: int = 1000
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    OVERDUE_SWEEP_ENABLED: bool = True
+    OVERDUE_SWEEP_INTERVAL_SECONDS: int = 3600
+    OVERDUE_SWEEP_BATCH_SIZE: int = 1000
+    BILL_ARCHIVE_AFTER_DAYS: int = 365
+    BILL_ARCHIVE_BATCH_SIZE: int = 1000
+
+    # Invoice Settings (share INVOICE_CACHE_DIR between workers on one host)
+    INVOICE_CACHE_DIR: str = "invoice_cache"
+    INVOICE_CACHE_MAX_BYTES: int = 512 * 1024 * 1024
+    INVOICE_RENDER_WORKERS: int = 2
+
+    # Pagination Settings
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 200
+    EXPORT_BATCH_SIZE: int = 500
+    IMPORT_BATCH_SIZE: int = 1000
+    # Every new customer costs a bcrypt hash, so bigger files go through manage.py
+    IMPORT_MAX_ROWS_PER_REQUEST: int = 500
+    IMPORT_MAX_UPLOAD_BYTES: int = 1048576
+    BATCH_MAX_OPERATIONS: int = 500
+
+    # Task Event Stream Settings
+    TASK_EVENTS_BUFFER_SIZE: int = 1000
+    TASK_EVENTS_CHANGE_STREAM: bool = False
+    SSE_KEEPALIVE_SECONDS: int = 15
+
+    # Task History Settings (task_events is written in batches behind the request)
+    TASK_HISTORY_FLUSH_SIZE: int = 500
+    TASK_HISTORY_FLUSH_INTERVAL_SECONDS: float = 1.0
+    TASK_HISTORY_MAX_PENDING: int = 50000
+
+    # Cache Settings
+    USER_CACHE_MAX_SIZE: int = 10000
+    USER_CACHE_TTL_SECONDS: int = 60
+    TOKEN_CACHE_MAX_SIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    RESPONSE_CACHE_MAX_SIZE: int = 5000
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+
+    # Login Rate Limit Settings
+    LOGIN_RATE_LIMIT_ENABLED: bool = True
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "mongo" (shared)
+    LOGIN_RATE_LIMIT_MAX_KEYS: int = 100000
+    LOGIN_RATE_IP_CAPACITY: int = 20
+    LOGIN_RATE_IP_PER_MINUTE: float = 30
+    LOGIN_RATE_MOBILE_CAPACITY: int = 5
+    LOGIN_RATE_MOBILE_PER_MINUTE: float = 5
+    LOGIN_LOCKOUT_THRESHOLD: int = 5
+    LOGIN_LOCKOUT_BASE_SECONDS: int = 30
+    LOGIN_LOCKOUT_MAX_SECONDS: int = 3600
+    # Reverse proxies in front of the API; the per-IP bucket keys on the client address
+    # they report in X-Forwarded-For. 0 uses the socket peer and ignores the header.
+    TRUSTED_PROXY_COUNT: int = 0
+
+    # Dashboard Stats Settings
+    STATS_CACHE_TTL_SECONDS: int = 30
+    STATS_USE_COUNTERS: bool = False
 
     # CORS Settings
     BACKEND_CORS_ORIGINS: list = ["http://localhost:5173", "http://localhost:3000", "http://localhost:8080"]
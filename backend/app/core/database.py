@@ -1,29 +1,84 @@
-from pymongo import MongoClient
-from pymongo.database import Database
+from typing import Dict
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection, AsyncIOMotorDatabase
+from pymongo import ReadPreference
 from app.core.config import settings
+from app.core.metrics import mongo_command_listener, mongo_pool_listener
+
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
 
 
 class MongoDB:
-    client: MongoClient = None
-    db: Database = None
+    client: AsyncIOMotorClient = None
+    db: AsyncIOMotorDatabase = None
+    collections: Dict[str, AsyncIOMotorCollection] = {}
 
 
 mongodb = MongoDB()
 
 
-def connect_to_mongo():
+def client_options() -> dict:
+    """Pool, timeout, compression, write concern and read preference options from settings"""
+    if settings.MONGODB_READ_PREFERENCE not in READ_PREFERENCES:
+        raise ValueError(f"Unknown MONGODB_READ_PREFERENCE: {settings.MONGODB_READ_PREFERENCE}")
+    options = {
+        "maxPoolSize": settings.MONGODB_MAX_POOL_SIZE,
+        "minPoolSize": settings.MONGODB_MIN_POOL_SIZE,
+        "maxConnecting": settings.MONGODB_MAX_CONNECTING,
+        "waitQueueTimeoutMS": settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+        "serverSelectionTimeoutMS": settings.MONGODB_SERVER_SELECTION_TIMEOUT_MS,
+        "connectTimeoutMS": settings.MONGODB_CONNECT_TIMEOUT_MS,
+        "socketTimeoutMS": settings.MONGODB_SOCKET_TIMEOUT_MS,
+        "w": int(settings.MONGODB_WRITE_CONCERN) if settings.MONGODB_WRITE_CONCERN.isdigit() else settings.MONGODB_WRITE_CONCERN,
+        "wTimeoutMS": settings.MONGODB_WRITE_TIMEOUT_MS,
+        "readPreference": settings.MONGODB_READ_PREFERENCE,
+    }
+    if settings.MONGODB_COMPRESSORS:
+        options["compressors"] = settings.MONGODB_COMPRESSORS
+    return options
+
+
+async def connect_to_mongo():
     """Connect to MongoDB"""
-    mongodb.client = MongoClient(settings.MONGODB_URL)
+    unknown = set(settings.MONGODB_COLLECTION_READ_PREFERENCES.values()) - set(READ_PREFERENCES)
+    if unknown:
+        raise ValueError(f"Unknown read preference in MONGODB_COLLECTION_READ_PREFERENCES: {', '.join(sorted(unknown))}")
+    mongodb.client = AsyncIOMotorClient(
+        settings.MONGODB_URL,
+        event_listeners=[mongo_command_listener, mongo_pool_listener],
+        **client_options()
+    )
     mongodb.db = mongodb.client[settings.MONGODB_DB_NAME]
+    mongodb.collections = {}
     print(f"✅ Connected to MongoDB: {settings.MONGODB_DB_NAME}")
 
 
-def close_mongo_connection():
+async def close_mongo_connection():
     """Close MongoDB connection"""
     mongodb.client.close()
+    mongodb.collections = {}
     print("❌ Closed MongoDB connection")
 
 
-def get_database() -> Database:
+def get_database() -> AsyncIOMotorDatabase:
     """Get MongoDB database instance"""
     return mongodb.db
+
+
+def get_collection(name: str) -> AsyncIOMotorCollection:
+    """Get a collection from the lifespan-managed client, with its configured read preference"""
+    collection = mongodb.collections.get(name)
+    if collection is None:
+        mode = settings.MONGODB_COLLECTION_READ_PREFERENCES.get(name)
+        if mode:
+            collection = mongodb.db.get_collection(name, read_preference=READ_PREFERENCES[mode])
+        else:
+            collection = mongodb.db[name]
+        mongodb.collections[name] = collection
+    return collection
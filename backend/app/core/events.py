@@ -0,0 +1,87 @@
+import asyncio
+import uuid
+from collections import deque
+from typing import Deque, List, Optional, Set, Tuple
+
+
+class Event:
+    __slots__ = ("id", "seq", "type", "data")
+
+    def __init__(self, id: str, seq: int, type: str, data: dict):
+        self.id = id
+        self.seq = seq
+        self.type = type
+        self.data = data
+
+
+class EventBus:
+    """In-process pub/sub with a replay buffer for reconnecting subscribers
+
+    Event ids are "<epoch>-<seq>", where epoch identifies this bus instance.
+    A subscriber resuming with an id from this epoch gets every buffered event
+    after it; an id from another epoch (another worker or a restart) or older
+    than the buffer cannot be resumed, and the subscriber is told to reset.
+    """
+
+    def __init__(self, buffer_size: int = 1000, queue_size: int = 100):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped_subscribers = 0
+        self._seq = 0
+        self._buffer: Deque[Event] = deque(maxlen=buffer_size)
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def publish(self, type: str, data: dict) -> Event:
+        """Publish an event to every subscriber and the replay buffer"""
+        self._seq += 1
+        event = Event(f"{self.epoch}-{self._seq}", self._seq, type, data)
+        self._buffer.append(event)
+        self.published += 1
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # A subscriber that cannot keep up is disconnected rather than
+                # letting its backlog grow without bound; it resumes from the buffer
+                self._subscribers.discard(queue)
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+                self.dropped_subscribers += 1
+        return event
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Tuple[asyncio.Queue, List[Event], bool]:
+        """Register a subscriber; returns (queue, events to replay, whether the client must reset)"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        if not last_event_id:
+            return queue, [], False
+
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return queue, [], True
+        seq = int(seq)
+        oldest = self._buffer[0].seq if self._buffer else self._seq + 1
+        if seq < oldest - 1:
+            return queue, [], True
+        return queue, [event for event in self._buffer if event.seq > seq], False
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    def close(self) -> None:
+        """End every subscription (used on shutdown)"""
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass
+        self._subscribers.clear()
+
+    def stats(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "published": self.published,
+            "dropped_subscribers": self.dropped_subscribers,
+        }
@@ -0,0 +1,123 @@
+import hashlib
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+from fastapi import HTTPException, Request, Response, status
+from pymongo.errors import DuplicateKeyError
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.database import get_collection
+
+
+IDEMPOTENCY_KEY_MAX_LENGTH = 255
+
+# A claim still pending after this long belongs to a worker that died mid-request
+PENDING_TIMEOUT = timedelta(seconds=60)
+
+
+class IdempotencyStore:
+    """Responses of requests sent with an Idempotency-Key, stored in idempotency_keys
+
+    The first request with a key claims it with an insert (the unique _id makes
+    the claim atomic across workers), runs, and stores its response. Retries
+    with the same key replay that response instead of running again; a TTL
+    index on created_at forgets keys after IDEMPOTENCY_KEY_TTL_SECONDS.
+    """
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return get_collection("idempotency_keys")
+
+    async def run(
+        self,
+        request: Request,
+        scope: str,
+        key: Optional[str],
+        render: Callable[[], Awaitable[Response]]
+    ) -> Response:
+        """Run render() at most once per (scope, key) and replay its response for retries"""
+        if key is None:
+            return await render()
+        if not key or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Idempotency-Key must be 1-{IDEMPOTENCY_KEY_MAX_LENGTH} characters"
+            )
+
+        record_id = f"{scope}:{key}"
+        fingerprint = await self._fingerprint(request)
+        try:
+            await self.collection.insert_one({
+                "_id": record_id,
+                "fingerprint": fingerprint,
+                "state": "pending",
+                "created_at": datetime.utcnow()
+            })
+        except DuplicateKeyError:
+            return await self._replay(record_id, fingerprint)
+
+        try:
+            response = await render()
+        except HTTPException as e:
+            # Client errors are as final as successes; store them so retries agree
+            await self._store(record_id, {
+                "error": True, "status_code": e.status_code, "detail": e.detail, "headers": e.headers
+            })
+            raise
+        except BaseException:
+            # Let a retry run again after an unexpected failure
+            await self.collection.delete_one({"_id": record_id})
+            raise
+
+        if response.status_code >= 500:
+            await self.collection.delete_one({"_id": record_id})
+        else:
+            await self._store(record_id, {
+                "error": False, "status_code": response.status_code, "body": response.body, "media_type": response.media_type
+            })
+        return response
+
+    async def _replay(self, record_id: str, fingerprint: str) -> Response:
+        record = await self.collection.find_one({"_id": record_id})
+        if record is None:
+            # The original attempt failed and released the key; ask for a retry
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key was just retried; try again",
+                headers={"Retry-After": "1"}
+            )
+        if record["fingerprint"] != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request"
+            )
+        if record["state"] == "pending":
+            if record["created_at"] < datetime.utcnow() - PENDING_TIMEOUT:
+                await self.collection.delete_one({"_id": record_id, "state": "pending"})
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"}
+            )
+
+        if record["error"]:
+            raise HTTPException(
+                status_code=record["status_code"],
+                detail=record["detail"],
+                headers={**(record["headers"] or {}), "Idempotent-Replayed": "true"}
+            )
+        return Response(
+            content=record["body"],
+            status_code=record["status_code"],
+            media_type=record["media_type"],
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    async def _store(self, record_id: str, outcome: dict) -> None:
+        await self.collection.update_one({"_id": record_id}, {"$set": {"state": "done", **outcome}})
+
+    async def _fingerprint(self, request: Request) -> str:
+        digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+        digest.update(await request.body())
+        return digest.hexdigest()
+
+
+idempotency_store = IdempotencyStore()
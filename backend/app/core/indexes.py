@@ -0,0 +1,173 @@
+from typing import Any, Dict, List
+from pymongo import ASCENDING, DESCENDING, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.core.database import get_database
+
+
+# Declarative index registry: collection name -> indexes the app relies on
+INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        IndexModel([("mobile", ASCENDING)], name="mobile_unique", unique=True),
+    ],
+    "bills": [
+        IndexModel([("user_id", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="user_id_created_at_id"),
+        IndexModel([("user_id", ASCENDING), ("month", ASCENDING)], name="user_id_month_unique", unique=True),
+        IndexModel([("status", ASCENDING), ("due_date", ASCENDING)], name="status_due_date"),
+        IndexModel([("month", ASCENDING)], name="month"),
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)], name="status_created_at"),
+    ],
+    "bills_archive": [
+        IndexModel([("user_id", ASCENDING), ("year", DESCENDING)], name="user_id_year"),
+        IndexModel([("bills._id", ASCENDING)], name="bills_id"),
+    ],
+    "tasks": [
+        IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="status_created_at_id"),
+        IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at_id"),
+        IndexModel([("mobile", ASCENDING), ("_id", ASCENDING)], name="mobile_id"),
+        # No language: names and localities should be matched as written, not stemmed
+        IndexModel([("name", TEXT), ("address", TEXT)], name="name_address_text", default_language="none"),
+    ],
+    "task_events": [
+        IndexModel([("task_id", ASCENDING), ("at", ASCENDING)], name="task_id_at"),
+        IndexModel([("status", ASCENDING), ("at", ASCENDING)], name="status_at"),
+    ],
+    "idempotency_keys": [
+        IndexModel([("created_at", ASCENDING)], name="created_at_ttl", expireAfterSeconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS),
+    ],
+    "revoked_tokens": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("revoked_at", ASCENDING)], name="revoked_at"),
+    ],
+    "used_refresh_tokens": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+    "rate_limits": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+    ],
+}
+
+
+# Indexes the registry used to declare; `manage.py indexes apply` drops them where they still exist
+OBSOLETE_INDEXES: Dict[str, List[str]] = {
+    "tasks": [
+        # Replaced by status_created_at_id, which also covers the cursor's _id tiebreak
+        "status_created_at",
+        # Replaced by mobile_id when mobile-prefix search moved to a (mobile, _id) sort
+        "mobile_created_at_id",
+    ],
+}
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase = None) -> Dict[str, List[str]]:
+    """Create every registered index (no-op for indexes that already exist)
+
+    Indexes are built one at a time so one that cannot be built, typically a
+    unique index over data that already holds duplicates, is logged and
+    skipped instead of stopping startup. `manage.py indexes duplicates`
+    lists the offending documents.
+    """
+    db = db if db is not None else get_database()
+    created = {}
+    for collection_name, indexes in INDEXES.items():
+        names = []
+        for index in indexes:
+            try:
+                names += await db[collection_name].create_indexes([index])
+            except OperationFailure as e:
+                print(f"⚠️  Could not build index {collection_name}.{index.document['name']}: {e} "
+                      "(see `python manage.py indexes duplicates`)")
+        created[collection_name] = names
+    return created
+
+
+async def duplicate_keys(db: AsyncIOMotorDatabase = None, limit: int = 100) -> Dict[str, List[Dict[str, Any]]]:
+    """Key values held by more than one document, for each registered unique index
+
+    Keyed by "collection.index"; each entry has the key values, the count
+    and the ids of the documents sharing them. These have to be resolved
+    before the unique index can be built.
+    """
+    db = db if db is not None else get_database()
+    duplicates = {}
+    for collection_name, indexes in INDEXES.items():
+        for index in indexes:
+            if not index.document.get("unique"):
+                continue
+            fields = list(index.document["key"])
+            pipeline = [
+                {"$group": {
+                    "_id": {field.replace(".", "_"): f"${field}" for field in fields},
+                    "count": {"$sum": 1},
+                    "ids": {"$push": "$_id"},
+                }},
+                {"$match": {"count": {"$gt": 1}}},
+                {"$limit": limit},
+            ]
+            rows = await db[collection_name].aggregate(pipeline, allowDiskUse=True).to_list(length=limit)
+            if rows:
+                duplicates[f"{collection_name}.{index.document['name']}"] = [
+                    {"key": row["_id"], "count": row["count"], "ids": [str(document_id) for document_id in row["ids"]]}
+                    for row in rows
+                ]
+    return duplicates
+
+
+async def obsolete_indexes(db: AsyncIOMotorDatabase = None) -> Dict[str, List[str]]:
+    """Names of obsolete indexes that still exist, per collection"""
+    db = db if db is not None else get_database()
+    obsolete = {}
+    for collection_name, names in OBSOLETE_INDEXES.items():
+        existing = await db[collection_name].index_information()
+        present = [name for name in names if name in existing]
+        if present:
+            obsolete[collection_name] = present
+    return obsolete
+
+
+async def drop_obsolete_indexes(db: AsyncIOMotorDatabase = None) -> Dict[str, List[str]]:
+    """Drop obsolete indexes that still exist; returns what was dropped"""
+    db = db if db is not None else get_database()
+    obsolete = await obsolete_indexes(db)
+    for collection_name, names in obsolete.items():
+        for name in names:
+            await db[collection_name].drop_index(name)
+    return obsolete
+
+
+async def missing_indexes(db: AsyncIOMotorDatabase = None) -> Dict[str, List[str]]:
+    """Names of registered indexes that do not exist yet, per collection"""
+    db = db if db is not None else get_database()
+    missing = {}
+    for collection_name, indexes in INDEXES.items():
+        existing = await db[collection_name].index_information()
+        names = [index.document["name"] for index in indexes if index.document["name"] not in existing]
+        if names:
+            missing[collection_name] = names
+    return missing
+
+
+async def index_report(db: AsyncIOMotorDatabase = None) -> Dict[str, Dict[str, List[str]]]:
+    """Report registered indexes that are missing, obsolete indexes still present and indexes never used"""
+    db = db if db is not None else get_database()
+    missing = await missing_indexes(db)
+    obsolete = await obsolete_indexes(db)
+    report = {}
+    for collection_name in INDEXES:
+        collection = db[collection_name]
+        unused = []
+        try:
+            async for stats in collection.aggregate([{"$indexStats": {}}]):
+                if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+                    unused.append(stats["name"])
+        except OperationFailure:
+            # $indexStats needs the clusterMonitor role; skip usage data without it
+            pass
+
+        report[collection_name] = {
+            "missing": missing.get(collection_name, []),
+            "obsolete": obsolete.get(collection_name, []),
+            "unused": sorted(unused),
+        }
+    return report
@@ -0,0 +1,82 @@
+import base64
+import json
+from datetime import datetime
+from typing import Optional, Tuple
+from bson import ObjectId
+
+
+def _encode(data: dict) -> str:
+    raw = json.dumps(data).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode(cursor: str) -> dict:
+    padded = cursor + "=" * (-len(cursor) % 4)
+    return json.loads(base64.urlsafe_b64decode(padded))
+
+
+def encode_cursor(created_at: datetime, oid: ObjectId) -> str:
+    """Encode the sort key of the last item on a page as an opaque cursor"""
+    return _encode({"c": created_at.isoformat(), "i": str(oid)})
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Decode a cursor produced by encode_cursor; raises ValueError if malformed"""
+    try:
+        data = _decode(cursor)
+        return datetime.fromisoformat(data["c"]), ObjectId(data["i"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_filter(cursor: Optional[str]) -> dict:
+    """Filter selecting documents after the cursor in (created_at, _id) descending order"""
+    if not cursor:
+        return {}
+    created_at, oid = decode_cursor(cursor)
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": oid}},
+        ]
+    }
+
+
+def encode_mobile_cursor(mobile: str, oid: ObjectId) -> str:
+    """Cursor for pages sorted by (mobile, _id) ascending"""
+    return _encode({"m": mobile, "i": str(oid)})
+
+
+def mobile_keyset_filter(cursor: Optional[str]) -> dict:
+    """Filter selecting documents after the cursor in (mobile, _id) ascending order"""
+    if not cursor:
+        return {}
+    try:
+        data = _decode(cursor)
+        mobile, oid = str(data["m"]), ObjectId(data["i"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return {
+        "$or": [
+            {"mobile": {"$gt": mobile}},
+            {"mobile": mobile, "_id": {"$gt": oid}},
+        ]
+    }
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """Cursor for pages that have no indexable sort key, such as relevance order"""
+    return _encode({"o": offset})
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> int:
+    """Offset of a cursor produced by encode_offset_cursor (0 for the first page)"""
+    if not cursor:
+        return 0
+    try:
+        offset = int(_decode(cursor)["o"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if offset < 0:
+        raise ValueError("Invalid cursor")
+    return offset
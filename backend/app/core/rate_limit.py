@@ -0,0 +1,242 @@
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from motor.motor_asyncio import AsyncIOMotorCollection
+from starlette.requests import Request
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import get_collection
+
+
+class RateLimitBackend(ABC):
+    """Storage for token buckets and failure counters
+
+    take() and record_failure() must be atomic per key so that several workers
+    sharing one backend cannot overspend a bucket.
+    """
+
+    @abstractmethod
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        """Take one token; return 0 on success, else seconds until a token is available"""
+
+    @abstractmethod
+    async def locked_for(self, key: str) -> float:
+        """Seconds left on the key's lockout (0 if not locked)"""
+
+    @abstractmethod
+    async def record_failure(self, key: str, threshold: int, base_seconds: float, max_seconds: float) -> float:
+        """Count a failure; return the lockout (seconds) it triggered, 0 if none"""
+
+    @abstractmethod
+    async def reset(self, key: str) -> None:
+        """Forget the key's failures and lockout"""
+
+
+def lockout_seconds(failures: int, threshold: int, base_seconds: float, max_seconds: float) -> float:
+    """Exponential lockout: base at the threshold, doubling with every further failure"""
+    if failures < threshold:
+        return 0.0
+    return min(max_seconds, base_seconds * 2 ** (failures - threshold))
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """Per-process backend; each worker enforces its own limits"""
+
+    def __init__(self, maxsize: int):
+        self._buckets = TTLCache(maxsize=maxsize, ttl=float("inf"))
+        self._failures = TTLCache(maxsize=maxsize, ttl=float("inf"))
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        now = time.time()
+        tokens, updated_at = self._buckets.get(key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+        if tokens < 1:
+            return (1 - tokens) / refill_per_second
+        # A bucket left alone until it refills is the same as no bucket
+        self._buckets.set(key, (tokens - 1, now), ttl=capacity / refill_per_second)
+        return 0.0
+
+    async def locked_for(self, key: str) -> float:
+        _, locked_until = self._failures.get(key, (0, 0.0))
+        return max(0.0, locked_until - time.time())
+
+    async def record_failure(self, key: str, threshold: int, base_seconds: float, max_seconds: float) -> float:
+        failures, locked_until = self._failures.get(key, (0, 0.0))
+        failures += 1
+        duration = lockout_seconds(failures, threshold, base_seconds, max_seconds)
+        if duration:
+            locked_until = time.time() + duration
+        self._failures.set(key, (failures, locked_until), ttl=max_seconds + duration)
+        return duration
+
+    async def reset(self, key: str) -> None:
+        self._failures.invalidate(key)
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+    """Backend shared by every worker through the rate_limits collection
+
+    Each call is a single pipeline update, so bucket arithmetic happens
+    atomically on the server. Times are stored as epoch seconds; a TTL index
+    on expires_at removes idle keys.
+    """
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return get_collection("rate_limits")
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        now = time.time()
+        elapsed = {"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}
+        refilled = {"$min": [capacity, {"$add": [{"$ifNull": ["$tokens", capacity]}, {"$multiply": [elapsed, refill_per_second]}]}]}
+        bucket = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"tokens": refilled, "updated_at": now}},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": self._expires_at(capacity / refill_per_second),
+                }},
+            ],
+            projection={"tokens": 1, "allowed": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if bucket["allowed"]:
+            return 0.0
+        return (1 - bucket["tokens"]) / refill_per_second
+
+    async def locked_for(self, key: str) -> float:
+        document = await self.collection.find_one({"_id": key}, {"locked_until": 1})
+        if not document or not document.get("locked_until"):
+            return 0.0
+        return max(0.0, document["locked_until"] - time.time())
+
+    async def record_failure(self, key: str, threshold: int, base_seconds: float, max_seconds: float) -> float:
+        duration = {"$min": [
+            max_seconds,
+            {"$multiply": [base_seconds, {"$pow": [2, {"$subtract": ["$failures", threshold]}]}]}
+        ]}
+        document = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {"failures": {"$add": [{"$ifNull": ["$failures", 0]}, 1]}}},
+                {"$set": {
+                    "locked_until": {"$cond": [
+                        {"$gte": ["$failures", threshold]}, {"$add": [time.time(), duration]}, {"$ifNull": ["$locked_until", 0]}
+                    ]},
+                    # Long enough to outlive any lockout and to remember failures for max_seconds
+                    "expires_at": self._expires_at(2 * max_seconds),
+                }},
+            ],
+            projection={"failures": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return lockout_seconds(document["failures"], threshold, base_seconds, max_seconds)
+
+    async def reset(self, key: str) -> None:
+        await self.collection.delete_one({"_id": key})
+
+    def _expires_at(self, seconds: float) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=seconds)
+
+
+def client_ip(request: Request) -> str:
+    """Address of the client that sent the request
+
+    Each of the TRUSTED_PROXY_COUNT proxies appends the address it got the
+    request from to X-Forwarded-For, so the client is that many entries from
+    the end; anything further left could be forged. Without trusted proxies
+    the header is ignored and the socket peer is used.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if settings.TRUSTED_PROXY_COUNT <= 0:
+        return peer
+    forwarded = [address.strip() for address in request.headers.get("x-forwarded-for", "").split(",") if address.strip()]
+    if not forwarded:
+        return peer
+    return forwarded[-min(settings.TRUSTED_PROXY_COUNT, len(forwarded))]
+
+
+class LoginGuard:
+    """Token-bucket limits per mobile and per client IP, plus exponential lockout
+
+    check() runs before the user lookup and bcrypt verify, so throttled
+    attempts never reach the users collection or the hasher pool. Lockouts
+    are keyed by mobile and IP together so a guesser cannot lock a customer
+    out from elsewhere; the per-mobile bucket still caps distributed guessing.
+    """
+
+    def __init__(self, backend: RateLimitBackend):
+        self.backend = backend
+        self.rejected_ip = 0
+        self.rejected_mobile = 0
+        self.rejected_lockout = 0
+        self.lockouts = 0
+
+    async def check(self, mobile: str, ip: str) -> float:
+        """Return 0 if the attempt may proceed, else seconds the client should wait"""
+        if not settings.LOGIN_RATE_LIMIT_ENABLED:
+            return 0.0
+
+        wait = await self.backend.locked_for(self._failure_key(mobile, ip))
+        if wait:
+            self.rejected_lockout += 1
+            return wait
+
+        wait = await self.backend.take(
+            f"login:ip:{ip}", settings.LOGIN_RATE_IP_CAPACITY, settings.LOGIN_RATE_IP_PER_MINUTE / 60
+        )
+        if wait:
+            self.rejected_ip += 1
+            return wait
+
+        wait = await self.backend.take(
+            f"login:mobile:{mobile}", settings.LOGIN_RATE_MOBILE_CAPACITY, settings.LOGIN_RATE_MOBILE_PER_MINUTE / 60
+        )
+        if wait:
+            self.rejected_mobile += 1
+        return wait
+
+    async def record_failure(self, mobile: str, ip: str) -> None:
+        """Count a failed attempt, locking the mobile/IP pair out once past the threshold"""
+        if not settings.LOGIN_RATE_LIMIT_ENABLED:
+            return
+        duration = await self.backend.record_failure(
+            self._failure_key(mobile, ip),
+            settings.LOGIN_LOCKOUT_THRESHOLD,
+            settings.LOGIN_LOCKOUT_BASE_SECONDS,
+            settings.LOGIN_LOCKOUT_MAX_SECONDS
+        )
+        if duration:
+            self.lockouts += 1
+
+    async def record_success(self, mobile: str, ip: str) -> None:
+        """Clear the failure count after a successful login"""
+        if settings.LOGIN_RATE_LIMIT_ENABLED:
+            await self.backend.reset(self._failure_key(mobile, ip))
+
+    def stats(self) -> dict:
+        """Return rejection and lockout counters"""
+        return {
+            "rejected_ip": self.rejected_ip,
+            "rejected_mobile": self.rejected_mobile,
+            "rejected_lockout": self.rejected_lockout,
+            "rejected_total": self.rejected_ip + self.rejected_mobile + self.rejected_lockout,
+            "lockouts": self.lockouts,
+        }
+
+    def _failure_key(self, mobile: str, ip: str) -> str:
+        return f"login:fail:{mobile}:{ip}"
+
+
+def _build_backend() -> RateLimitBackend:
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimitBackend()
+    return MemoryRateLimitBackend(maxsize=settings.LOGIN_RATE_LIMIT_MAX_KEYS)
+
+
+login_guard = LoginGuard(_build_backend())
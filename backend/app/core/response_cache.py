@@ -0,0 +1,39 @@
+import hashlib
+from typing import Awaitable, Callable
+from fastapi import Request, Response
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.versions import version_stamps
+
+
+# Serialized response bodies keyed by (data set, version, query string)
+response_cache = TTLCache(maxsize=settings.RESPONSE_CACHE_MAX_SIZE, ttl=settings.RESPONSE_CACHE_TTL_SECONDS)
+
+# Headers produced by the route that must be replayed with a cached body
+REPLAYED_HEADERS = ("x-next-cursor",)
+
+
+async def cached_response(request: Request, key: str, render: Callable[[], Awaitable[Response]]) -> Response:
+    """Serve a versioned data set with a strong ETag, from cache when possible
+
+    The current version of the data set is one indexed _id lookup; the body is
+    only rendered when no cached copy exists for that version and query string.
+    A matching If-None-Match gets 304 Not Modified with no body.
+    """
+    version = await version_stamps.get(key)
+    cache_key = (key, version, request.url.query)
+
+    entry = response_cache.get(cache_key)
+    if entry is None:
+        response = await render()
+        etag = '"' + hashlib.sha256(response.body).hexdigest()[:32] + '"'
+        headers = {name: value for name, value in response.headers.items() if name in REPLAYED_HEADERS}
+        entry = (etag, response.body, response.media_type, headers)
+        response_cache.set(cache_key, entry)
+
+    etag, body, media_type, headers = entry
+    validators = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=validators)
+    return Response(content=body, media_type=media_type, headers={**headers, **validators})
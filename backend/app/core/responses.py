@@ -0,0 +1,93 @@
+import os
+import re
+from typing import BinaryIO, Dict, Iterator, List, Optional, Type
+from fastapi import Request
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, TypeAdapter
+
+FILE_CHUNK_SIZE = 64 * 1024
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def model_response(model: Type[BaseModel], document: dict, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Validate one BSON document into a response model and encode it with pydantic-core"""
+    body = model.model_validate(document).model_dump_json()
+    return Response(content=body, status_code=status_code, media_type="application/json", headers=headers)
+
+
+def model_list_response(adapter: TypeAdapter, documents: List[dict], headers: Optional[Dict[str, str]] = None) -> Response:
+    """Validate BSON documents straight into response models and encode them in one pass
+
+    Returning a Response skips FastAPI's second response_model validation and
+    the jsonable_encoder walk; pydantic-core produces the JSON bytes directly.
+    """
+    body = adapter.dump_json(adapter.validate_python(documents))
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def documents_response(documents: List[dict], headers: Optional[Dict[str, str]] = None) -> ORJSONResponse:
+    """Encode partial documents (field projections) that cannot be validated against a response model"""
+    for document in documents:
+        document["id"] = str(document.pop("_id"))
+    return ORJSONResponse(documents, headers=headers)
+
+
+def _read_file(file: BinaryIO, start: int, length: int) -> Iterator[bytes]:
+    # A sync iterator: StreamingResponse runs it in the threadpool
+    try:
+        file.seek(start)
+        while length > 0:
+            chunk = file.read(min(FILE_CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+    finally:
+        file.close()
+
+
+def file_response(
+    request: Request,
+    file: BinaryIO,
+    media_type: str,
+    etag: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Stream an open file with a strong ETag, 304 on If-None-Match and single-range (206) support
+
+    Taking an open file means it can be served to the end even if a cache
+    evicts (unlinks) it meanwhile. The response closes the file.
+    """
+    size = os.fstat(file.fileno()).st_size
+    headers = {**(headers or {}), "ETag": etag, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        file.close()
+        return Response(status_code=304, headers={"ETag": etag})
+
+    start, end = 0, size - 1
+    status_code = 200
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    # Multiple ranges and ranges guarded by a stale If-Range get the whole file
+    match = RANGE_PATTERN.match(range_header.strip()) if range_header else None
+    first, last = match.groups() if match and (not if_range or if_range == etag) else (None, None)
+    # An invalid range such as bytes=5-2 or bytes=- is ignored, like no Range at all
+    if (first or last) and not (first and last and int(last) < int(first)):
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            start = max(size - int(last), 0)
+        if start >= size:
+            file.close()
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    length = end - start + 1
+    headers["Content-Length"] = str(length)
+    return StreamingResponse(
+        _read_file(file, start, length), status_code=status_code, media_type=media_type, headers=headers
+    )
@@ -0,0 +1,226 @@
+import asyncio
+import hashlib
+import math
+import time
+from datetime import datetime, timedelta
+from typing import Iterable, Optional, Set
+from pymongo.errors import DuplicateKeyError
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.config import settings
+from app.core.database import get_collection
+
+
+class BloomFilter:
+    """Fixed-size set membership test with false positives but no false negatives"""
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.capacity = capacity
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, item: str) -> None:
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+
+class RevocationList:
+    """Revoked token ids (jti) and session ids (sid), checked in memory on every request
+
+    The revoked_tokens collection is the source of truth; a TTL index drops
+    each entry once the token it revokes would have expired anyway. Every
+    worker keeps a Bloom filter of all entries plus an exact set of up to
+    REVOCATION_EXACT_MAX_SIZE of them, and pulls new entries every
+    REVOCATION_REFRESH_SECONDS. A Bloom miss (almost every request) answers
+    without touching MongoDB; a hit is confirmed by the exact set, or by a
+    lookup if the set overflowed. Revocations made through another worker take
+    effect here within one refresh interval.
+
+    Used refresh tokens are kept apart in used_refresh_tokens: they are only
+    ever checked on /auth/refresh, so they stay out of the in-memory structures.
+    """
+
+    def __init__(self, refresh_seconds: float, rebuild_seconds: float, capacity: int, error_rate: float, exact_max_size: int):
+        self.refresh_seconds = refresh_seconds
+        self.rebuild_seconds = rebuild_seconds
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.exact_max_size = exact_max_size
+        self.checks = 0
+        self.bloom_hits = 0
+        self.lookups = 0
+        self.refreshes = 0
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._exact: Set[str] = set()
+        self._exact_complete = True
+        self._loaded_until: Optional[datetime] = None
+        self._rebuilt_at = 0.0
+        # Ids revoked here while a rebuild is loading; merged into the rebuilt structures
+        self._revoked_during_rebuild: Optional[Set[str]] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return get_collection("revoked_tokens")
+
+    @property
+    def used_refresh_tokens(self) -> AsyncIOMotorCollection:
+        return get_collection("used_refresh_tokens")
+
+    async def is_revoked(self, *token_ids: Optional[str]) -> bool:
+        """True if any of the ids (a token's jti and sid) has been revoked"""
+        self.checks += 1
+        suspects = []
+        for token_id in token_ids:
+            if not token_id:
+                continue
+            if token_id in self._exact:
+                return True
+            if token_id in self._bloom:
+                suspects.append(token_id)
+        if not suspects:
+            return False
+        self.bloom_hits += 1
+        if self._exact_complete:
+            # The exact set holds every loaded entry, so this was a false positive
+            return False
+        return await self.is_revoked_in_db(*suspects)
+
+    async def is_revoked_in_db(self, *token_ids: Optional[str]) -> bool:
+        """Authoritative check against revoked_tokens, for rare paths such as token refresh"""
+        self.lookups += 1
+        ids = [token_id for token_id in token_ids if token_id]
+        return bool(ids) and await self.collection.find_one({"_id": {"$in": ids}}, {"_id": 1}) is not None
+
+    async def revoke(self, token_id: str, expires_at: datetime) -> bool:
+        """Revoke a jti or sid until expires_at; False if it was already revoked"""
+        self._add([token_id])
+        if self._revoked_during_rebuild is not None:
+            self._revoked_during_rebuild.add(token_id)
+        try:
+            await self.collection.insert_one({"_id": token_id, "revoked_at": datetime.utcnow(), "expires_at": expires_at})
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def use_refresh_token(self, token_id: str, expires_at: datetime) -> bool:
+        """Mark a refresh token's jti as used until it expires; False if it was already used"""
+        try:
+            await self.used_refresh_tokens.insert_one({"_id": token_id, "used_at": datetime.utcnow(), "expires_at": expires_at})
+        except DuplicateKeyError:
+            return False
+        return True
+
+    async def refresh(self) -> None:
+        """Load entries revoked since the last refresh, or everything when a rebuild is due"""
+        if time.monotonic() - self._rebuilt_at >= self.rebuild_seconds:
+            await self._rebuild()
+            return
+        # Overlap the previous window so entries written with a slightly older clock are not missed
+        since = self._loaded_until - timedelta(seconds=max(60, 2 * self.refresh_seconds))
+        await self._load({"revoked_at": {"$gte": since}})
+        self.refreshes += 1
+
+    async def _rebuild(self) -> None:
+        """Reload every live entry into fresh structures, dropping expired ones
+
+        The current structures keep answering checks until the new ones are
+        fully loaded, so no revoked token slips through while the load awaits.
+        """
+        self._revoked_during_rebuild = set()
+        try:
+            started_at = datetime.utcnow()
+            query = {"expires_at": {"$gt": started_at}}
+            count = await self.collection.count_documents(query)
+            ids = [document["_id"] async for document in self.collection.find(query, {"_id": 1})]
+            bloom = BloomFilter(max(self.capacity, 2 * count), self.error_rate)
+            exact: Set[str] = set()
+            exact_complete = self._fill(bloom, exact, ids + list(self._revoked_during_rebuild))
+        finally:
+            self._revoked_during_rebuild = None
+        # No await between building and swapping, so checks see either the old or the new structures
+        self._bloom, self._exact, self._exact_complete = bloom, exact, exact_complete
+        self._loaded_until = max(self._loaded_until or started_at, started_at)
+        self._rebuilt_at = time.monotonic()
+        self.refreshes += 1
+
+    async def _load(self, query: dict) -> None:
+        started_at = datetime.utcnow()
+        ids = [document["_id"] async for document in self.collection.find(query, {"_id": 1})]
+        self._add(ids)
+        self._loaded_until = max(self._loaded_until or started_at, started_at)
+
+    def _add(self, token_ids: Iterable[str]) -> None:
+        if not self._fill(self._bloom, self._exact, token_ids):
+            self._exact_complete = False
+
+    def _fill(self, bloom: BloomFilter, exact: Set[str], token_ids: Iterable[str]) -> bool:
+        """Add ids to a filter and exact set; False if the exact set ran out of room"""
+        complete = True
+        for token_id in token_ids:
+            if token_id in exact:
+                continue
+            bloom.add(token_id)
+            if len(exact) < self.exact_max_size:
+                exact.add(token_id)
+            else:
+                complete = False
+        return complete
+
+    async def _run_forever(self):
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Token revocation refresh failed: {e}")
+
+    async def start(self):
+        """Load the revocation list, then keep it fresh in the background"""
+        await self._rebuild()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Return filter size and check counters"""
+        return {
+            "entries": self._bloom.count,
+            "exact_entries": len(self._exact),
+            "bloom_bits": self._bloom.size,
+            "checks": self.checks,
+            "bloom_hits": self.bloom_hits,
+            "lookups": self.lookups,
+            "refreshes": self.refreshes,
+        }
+
+
+revocation_list = RevocationList(
+    refresh_seconds=settings.REVOCATION_REFRESH_SECONDS,
+    rebuild_seconds=settings.REVOCATION_REBUILD_SECONDS,
+    capacity=settings.REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.REVOCATION_BLOOM_ERROR_RATE,
+    exact_max_size=settings.REVOCATION_EXACT_MAX_SIZE
+)
@@ -1,39 +1,150 @@
+import asyncio
+import time
+import uuid
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
-from jose import JWTError, jwt
-from passlib.context import CryptContext
+from functools import lru_cache
+from typing import Optional, Tuple
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_LATENCY, PASSWORD_HASH_WAIT
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# passlib and jose (with its crypto backends) are imported on first use, not at startup
+
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    """Password hashing context, built on first use"""
+    from passlib.context import CryptContext
+    return CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
-    to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    if not expires_delta:
+        expires_delta = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    return _create_token(data, "access", expires_delta)
+
+
+def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
+    """Create JWT refresh token, accepted only by the refresh endpoint"""
+    if not expires_delta:
+        expires_delta = timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    return _create_token(data, "refresh", expires_delta)
+
+
+def create_token_pair(mobile: str, role: str, session_id: Optional[str] = None) -> dict:
+    """Access and refresh token for one session (device); both carry its sid"""
+    data = {"sub": mobile, "role": role, "sid": session_id or uuid.uuid4().hex}
+    return {
+        "access_token": create_access_token(data),
+        "refresh_token": create_refresh_token(data),
+        "token_type": "bearer",
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    }
 
-    to_encode.update({"exp": expire})
+
+def _create_token(data: dict, token_type: str, expires_delta: timedelta) -> str:
+    to_encode = data.copy()
+    # Every token gets its own id so it can be revoked on its own
+    to_encode.update({"exp": datetime.utcnow() + expires_delta, "jti": uuid.uuid4().hex, "type": token_type})
+    from jose import jwt
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against a hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    return get_pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
     """Hash a password"""
-    return pwd_context.hash(password)
+    return get_pwd_context().hash(password)
+
+
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password and return a replacement hash if the stored cost is outdated"""
+    return get_pwd_context().verify_and_update(plain_password, hashed_password)
+
+
+def _timed_call(func, *args):
+    """Run func in a worker and report how long the work itself took"""
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
 
 
-def decode_token(token: str) -> Optional[dict]:
-    """Decode and verify a JWT token"""
+class PasswordHasher:
+    """Runs bcrypt on a bounded worker pool so it never blocks the event loop"""
+
+    def __init__(self, workers: int, use_processes: bool = False):
+        self.workers = workers
+        self.use_processes = use_processes
+        self.pending = 0
+        self.completed = 0
+        self._executor: Optional[Executor] = None
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            executor_class = ProcessPoolExecutor if self.use_processes else ThreadPoolExecutor
+            self._executor = executor_class(max_workers=self.workers)
+        return self._executor
+
+    async def _run(self, func, *args):
+        self.pending += 1
+        submitted = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            elapsed, result = await loop.run_in_executor(self._get_executor(), _timed_call, func, *args)
+            PASSWORD_HASH_LATENCY.labels(func.__name__).observe(elapsed)
+            PASSWORD_HASH_WAIT.labels(func.__name__).observe(max(time.perf_counter() - submitted - elapsed, 0))
+            return result
+        finally:
+            self.pending -= 1
+            self.completed += 1
+
+    async def hash(self, password: str) -> str:
+        """Hash a password on the worker pool"""
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a password on the worker pool"""
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify a password on the worker pool, returning a rehash if the cost changed"""
+        return await self._run(verify_and_update_password, plain_password, hashed_password)
+
+    def stats(self) -> dict:
+        """Return queue depth and throughput counters"""
+        return {
+            "workers": self.workers,
+            "active": min(self.pending, self.workers),
+            "queued": max(self.pending - self.workers, 0),
+            "completed": self.completed,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the worker pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    use_processes=settings.PASSWORD_HASH_USE_PROCESSES
+)
+
+
+def decode_token(token: str, token_type: str = "access") -> Optional[dict]:
+    """Decode and verify a JWT token of the given type"""
+    from jose import JWTError, jwt
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        return payload
     except JWTError:
         return None
+    # Tokens issued before refresh tokens existed have no type and are access tokens
+    if payload.get("type", "access") != token_type:
+        return None
+    return payload
@@ -0,0 +1,47 @@
+from typing import Iterable
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.database import get_collection
+
+
+TASKS_VERSION_KEY = "tasks"
+
+# Epoch seconds below which Paid bills may have been moved to bills_archive
+BILLS_ARCHIVE_WATERMARK_KEY = "bills_archive_watermark"
+
+
+def bills_version_key(user_id: str) -> str:
+    return f"bills:{user_id}"
+
+
+class VersionStamps:
+    """Monotonic version counters for cached data sets, stored in the versions collection
+
+    Keeping the counters in MongoDB (rather than per process) means a write
+    handled by one worker invalidates cached responses in every worker.
+    """
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return get_collection("versions")
+
+    async def get(self, key: str) -> int:
+        """Current version of a data set (0 if it was never bumped)"""
+        document = await self.collection.find_one({"_id": key}, {"v": 1})
+        return document["v"] if document else 0
+
+    async def bump(self, *keys: str) -> None:
+        """Advance the version of one or more data sets after a write"""
+        await self.bump_many(keys)
+
+    async def raise_to(self, key: str, value: int) -> None:
+        """Move a counter forward to value; it never goes back"""
+        await self.collection.update_one({"_id": key}, {"$max": {"v": value}}, upsert=True)
+
+    async def bump_many(self, keys: Iterable[str]) -> None:
+        requests = [UpdateOne({"_id": key}, {"$inc": {"v": 1}}, upsert=True) for key in set(keys)]
+        if requests:
+            await self.collection.bulk_write(requests, ordered=False)
+
+
+version_stamps = VersionStamps()
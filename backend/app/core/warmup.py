@@ -0,0 +1,41 @@
+import time
+from datetime import timedelta
+from typing import Dict
+from app.core.database import get_database
+from app.core.indexes import missing_indexes
+from app.core.security import create_access_token, decode_token, password_hasher
+
+
+async def warm_up() -> Dict[str, float]:
+    """Pay first-use costs before the worker takes traffic; returns seconds per step
+
+    Each step is best effort: a failure is logged and startup continues, so a
+    slow or briefly unreachable database never keeps a new worker down.
+    """
+    timings = {}
+
+    async def step(name, action):
+        started = time.perf_counter()
+        try:
+            await action()
+        except Exception as e:
+            print(f"⚠️  Warm-up step '{name}' failed: {e}")
+        timings[name] = round(time.perf_counter() - started, 4)
+
+    async def ping():
+        await get_database().command("ping")
+
+    async def check_indexes():
+        missing = await missing_indexes()
+        if missing:
+            print(f"⚠️  Missing indexes: {missing} (run: python manage.py indexes apply)")
+
+    async def load_crypto():
+        # Starts the hash workers and loads the bcrypt and JWT backends
+        await password_hasher.hash("warm-up")
+        decode_token(create_access_token({"sub": "warm-up"}, timedelta(seconds=60)))
+
+    await step("ping", ping)
+    await step("indexes", check_indexes)
+    await step("crypto", load_crypto)
+    return timings
@@ -0,0 +1,121 @@
+import asyncio
+from typing import List, Optional, Set
+from pymongo.errors import BulkWriteError, PyMongoError
+from app.core.database import get_collection
+
+
+class WriteBehindBuffer:
+    """Collects documents in memory and writes them with insert_many in the background
+
+    add() never waits on MongoDB: a flush starts once max_items documents are
+    buffered, and a background task flushes whatever is left every
+    flush_interval_seconds. stop() drains the buffer, so a clean shutdown loses
+    nothing. If MongoDB is unreachable, failed batches are kept and retried;
+    past max_pending documents the oldest are dropped rather than letting
+    memory grow without bound.
+    """
+
+    def __init__(self, collection_name: str, max_items: int, flush_interval_seconds: float, max_pending: int):
+        self.collection_name = collection_name
+        self.max_items = max_items
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_pending = max_pending
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self._pending: List[dict] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._flush_tasks: Set[asyncio.Task] = set()
+
+    def add(self, document: dict) -> None:
+        """Queue one document for insertion"""
+        self.add_many([document])
+
+    def add_many(self, documents: List[dict]) -> None:
+        """Queue documents for insertion, starting a flush if the buffer is full"""
+        self._pending.extend(documents)
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+        if len(self._pending) >= self.max_items:
+            try:
+                task = asyncio.get_running_loop().create_task(self.flush())
+            except RuntimeError:
+                # No event loop (e.g. a script); the next flush() picks the documents up
+                return
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns the number of documents written"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            written = 0
+            while self._pending:
+                batch = self._pending[:self.max_items]
+                del self._pending[:len(batch)]
+                try:
+                    await get_collection(self.collection_name).insert_many(batch, ordered=False)
+                except BulkWriteError as e:
+                    # Duplicates are batches that were written before a retry; nothing to redo
+                    if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                        self._requeue(batch)
+                        return written
+                except PyMongoError as e:
+                    print(f"⚠️  Writing {len(batch)} {self.collection_name} documents failed: {e}")
+                    self._requeue(batch)
+                    return written
+                written += len(batch)
+                self.written += len(batch)
+                self.flushes += 1
+            return written
+
+    def _requeue(self, batch: List[dict]) -> None:
+        self.failed_flushes += 1
+        self._pending[:0] = batch
+        overflow = len(self._pending) - self.max_pending
+        if overflow > 0:
+            del self._pending[:overflow]
+            self.dropped += overflow
+
+    async def _run_forever(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  {self.collection_name} flush failed: {e}")
+
+    def start(self):
+        """Start the periodic flush on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        """Stop the periodic flush and write out everything still buffered"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._flush_tasks:
+            await asyncio.gather(*self._flush_tasks, return_exceptions=True)
+        await self.flush()
+
+    def stats(self) -> dict:
+        """Return buffer depth and write counters"""
+        return {
+            "pending": len(self._pending),
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+        }
@@ -1,27 +1,89 @@
-from fastapi import FastAPI
+import time
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 from app.core.config import settings
 from app.core.database import connect_to_mongo, close_mongo_connection
-from app.api.routes import auth, bills, tasks
+from app.core.indexes import ensure_indexes
+from app.core.cache import user_cache, token_cache
+from app.core.rate_limit import login_guard
+from app.core.revocation import revocation_list
+from app.core.metrics import MetricsMiddleware, mongo_pool_listener, render_metrics, stats_collector
+from app.core.response_cache import response_cache
+from app.core.security import password_hasher
+from app.core.warmup import warm_up
+from app.services.invoice_service import invoice_service
+from app.services.overdue_sweeper import overdue_sweeper
+from app.services.stats_service import stats_service
+from app.services.task_events import task_change_stream, task_event_bus
+from app.services.task_history import task_history
+from app.api.routes import auth, bills, stats, tasks
+
+
+# Seconds spent in each startup phase, exported on /metrics
+startup_timings = {}
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Handle startup and shutdown events"""
     # Startup
-    connect_to_mongo()
+    started = time.perf_counter()
+    await connect_to_mongo()
+    if settings.ENSURE_INDEXES_ON_STARTUP:
+        indexes_started = time.perf_counter()
+        await ensure_indexes()
+        startup_timings["indexes_seconds"] = round(time.perf_counter() - indexes_started, 4)
+    seeded = await stats_service.ensure_counters()
+    if seeded:
+        print(f"📊 Seeded stats counters: {', '.join(seeded)}")
+    if settings.STARTUP_WARMUP:
+        timings = await warm_up()
+        startup_timings.update({f"warmup_{name}_seconds": seconds for name, seconds in timings.items()})
+    if settings.OVERDUE_SWEEP_ENABLED:
+        overdue_sweeper.start()
+    if settings.TASK_EVENTS_CHANGE_STREAM:
+        task_change_stream.start()
+    task_history.start()
+    await revocation_list.start()
+    startup_timings["seconds"] = round(time.perf_counter() - started, 4)
+    print(f"🚀 Startup finished in {startup_timings['seconds']}s")
     yield
     # Shutdown
-    close_mongo_connection()
+    task_event_bus.close()
+    await task_change_stream.stop()
+    await overdue_sweeper.stop()
+    await task_history.stop()
+    await revocation_list.stop()
+    await close_mongo_connection()
+    password_hasher.shutdown()
+    invoice_service.shutdown()
 
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
+# Request latency and in-flight metrics, plus counters kept by in-process components
+app.add_middleware(MetricsMiddleware)
+stats_collector.register("startup", lambda: startup_timings)
+stats_collector.register("mongo_pool", mongo_pool_listener.stats)
+stats_collector.register("user_cache", user_cache.stats)
+stats_collector.register("token_cache", token_cache.stats)
+stats_collector.register("response_cache", response_cache.stats)
+stats_collector.register("password_hasher", password_hasher.stats)
+stats_collector.register("overdue_sweeper", overdue_sweeper.stats)
+stats_collector.register("invoices", invoice_service.stats)
+stats_collector.register("task_events", task_event_bus.stats)
+stats_collector.register("task_history", task_history.stats)
+stats_collector.register("stats_cache", stats_service.cache_stats)
+stats_collector.register("login_guard", login_guard.stats)
+stats_collector.register("token_revocation", revocation_list.stats)
+
 # Set up CORS
 app.add_middleware(
     CORSMiddleware,
@@ -29,12 +91,14 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Content-Range", "Content-Disposition"],
 )
 
 # Include routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_STR}/auth", tags=["auth"])
 app.include_router(bills.router, prefix=f"{settings.API_V1_STR}/bills", tags=["bills"])
 app.include_router(tasks.router, prefix=f"{settings.API_V1_STR}/tasks", tags=["tasks"])
+app.include_router(stats.router, prefix=f"{settings.API_V1_STR}/stats", tags=["stats"])
 
 
 @app.get("/")
@@ -47,6 +111,13 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics endpoint"""
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
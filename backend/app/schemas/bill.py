@@ -1,16 +1,21 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
-from datetime import datetime
+from typing import Any, List, Literal, Optional
+from datetime import date, datetime
+from app.schemas.common import DocumentId
+
+# Billing month label as written by the billing run, e.g. "November 2024"
+MONTH_PATTERN = r"^[A-Z][a-z]+ \d{4}$"
 
 
 class BillBase(BaseModel):
     month: str
     amount: float
-    due_date: str
+    due_date: date
     status: Literal["Paid", "Overdue", "Due"] = "Due"
 
 
 class BillCreate(BillBase):
+    month: str = Field(..., pattern=MONTH_PATTERN)
     user_id: str
 
 
@@ -19,10 +24,23 @@ class BillUpdate(BaseModel):
 
 
 class BillResponse(BillBase):
-    id: str
+    id: DocumentId
     user_id: str
     pdf_filename: str
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class BillBatchRequest(BaseModel):
+    # Items are validated one by one so a bad item does not reject the batch
+    operations: List[Any] = Field(..., min_length=1)
+
+
+class BillBatchResult(BaseModel):
+    index: int
+    op: Optional[Literal["create", "update"]] = None
+    status: Literal["created", "updated", "unchanged", "not_found", "invalid", "failed"]
+    bill_id: Optional[str] = None
+    error: Optional[str] = None
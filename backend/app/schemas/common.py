@@ -0,0 +1,16 @@
+from typing import Annotated
+from bson import ObjectId
+from pydantic import AliasChoices, BeforeValidator, Field
+
+
+def _object_id_to_str(value):
+    return str(value) if isinstance(value, ObjectId) else value
+
+
+# Response ids accept either a formatted "id" or a raw Mongo "_id", so response
+# models can be validated straight from BSON documents without reshaping them
+DocumentId = Annotated[
+    str,
+    BeforeValidator(_object_id_to_str),
+    Field(validation_alias=AliasChoices("id", "_id")),
+]
@@ -0,0 +1,29 @@
+from pydantic import BaseModel
+from typing import Dict, List
+from datetime import datetime
+
+
+class TaskStats(BaseModel):
+    total: int
+    by_status: Dict[str, int]
+
+
+class MonthlyBillingStats(BaseModel):
+    month: str
+    due_count: int
+    overdue_count: int
+    outstanding_amount: float
+
+
+class BillingStats(BaseModel):
+    outstanding_count: int
+    outstanding_amount: float
+    overdue_count: int
+    overdue_amount: float
+    by_month: List[MonthlyBillingStats]
+
+
+class DashboardStats(BaseModel):
+    tasks: TaskStats
+    billing: BillingStats
+    generated_at: datetime
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
-from typing import Literal, Optional
+from typing import Any, List, Literal, Optional
 from datetime import datetime
+from app.schemas.common import DocumentId
 
 
 class TaskBase(BaseModel):
@@ -20,8 +21,54 @@ class TaskUpdate(BaseModel):
 
 
 class TaskResponse(TaskBase):
-    id: str
+    id: DocumentId
     created_at: datetime
 
     class Config:
         from_attributes = True
+
+
+class TaskImportResult(BaseModel):
+    row: int
+    status: Literal["created", "invalid", "failed"]
+    task_id: Optional[str] = None
+    user_created: bool = False
+    error: Optional[str] = None
+
+
+class TaskBatchRequest(BaseModel):
+    # Items are validated one by one so a bad item does not reject the batch
+    operations: List[Any] = Field(..., min_length=1)
+
+
+class TaskBatchResult(BaseModel):
+    index: int
+    op: Optional[Literal["create", "update"]] = None
+    status: Literal["created", "updated", "unchanged", "not_found", "invalid", "failed"]
+    task_id: Optional[str] = None
+    user_created: bool = False
+    error: Optional[str] = None
+
+
+class TaskHistoryEvent(BaseModel):
+    status: str
+    previous_status: Optional[str] = None
+    at: datetime
+
+
+class TaskTimeline(BaseModel):
+    task_id: str
+    events: List[TaskHistoryEvent]
+    lead_time_seconds: Optional[float] = None
+
+
+class TaskLeadTimes(BaseModel):
+    from_status: str
+    to_status: str
+    since: datetime
+    count: int
+    mean_seconds: Optional[float] = None
+    p50_seconds: Optional[float] = None
+    p90_seconds: Optional[float] = None
+    p95_seconds: Optional[float] = None
+    p99_seconds: Optional[float] = None
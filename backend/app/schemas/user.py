@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Optional, Literal
 from datetime import datetime
+from app.schemas.common import DocumentId
 
 
 class UserBase(BaseModel):
@@ -22,7 +23,7 @@ class UserLogin(BaseModel):
 
 
 class UserResponse(UserBase):
-    id: str
+    id: DocumentId
     address: Optional[str] = None
     plan: Optional[str] = None
     created_at: datetime
@@ -33,10 +34,16 @@ class UserResponse(UserBase):
 
 class Token(BaseModel):
     access_token: str
+    refresh_token: str
     token_type: str = "bearer"
+    expires_in: int
     user: UserResponse
 
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
 class TokenData(BaseModel):
     mobile: Optional[str] = None
     role: Optional[str] = None
@@ -1,55 +1,501 @@
-from typing import List
+import calendar
+import heapq
+import time
+from typing import Any, AsyncIterator, List, Optional, Tuple
 from bson import ObjectId
-from datetime import datetime
-from app.core.database import get_database
-from app.schemas.bill import BillCreate
+from datetime import date, datetime, timedelta, time as datetime_time
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.batch import CONFLICT_ERROR, batch_marker, parse_object_id, run_bulk_write, unapplied_updates, validate_operations
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.pagination import decode_cursor, encode_cursor, keyset_filter
+from app.core.versions import BILLS_ARCHIVE_WATERMARK_KEY, bills_version_key, version_stamps
+from app.schemas.bill import BillCreate, BillResponse, BillUpdate
+from app.services.stats_service import stats_service
+
+# Exactly the stored fields BillResponse needs (_id is always returned)
+BILL_RESPONSE_PROJECTION = {field: 1 for field in BillResponse.model_fields if field != "id"}
+
+# The same fields for bills inside a bills_archive bucket (user_id lives on the bucket)
+ARCHIVE_PROJECTION = {
+    "year": 1,
+    "bills._id": 1,
+    **{f"bills.{field}": 1 for field in BILL_RESPONSE_PROJECTION if field != "user_id"}
+}
+
+
+def _sort_key(bill: dict) -> Tuple[datetime, ObjectId]:
+    return bill["created_at"], bill["_id"]
 
 
 class BillService:
-    def __init__(self):
-        self.collection = get_database()["bills"]
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return get_collection("bills")
+
+    @property
+    def archive(self) -> AsyncIOMotorCollection:
+        """Paid bills past the archive horizon, one bucket document per customer and year"""
+        return get_collection("bills_archive")
 
-    def create_bill(self, bill_data: BillCreate) -> dict:
+    async def create_bill(self, bill_data: BillCreate) -> dict:
         """Create a new bill"""
-        bill_dict = {
-            "user_id": bill_data.user_id,
-            "month": bill_data.month,
-            "amount": bill_data.amount,
-            "due_date": bill_data.due_date,
-            "status": bill_data.status,
-            "pdf_filename": f"invoice_{bill_data.month.replace(' ', '_').lower()}.pdf",
-            "created_at": datetime.utcnow()
-        }
+        bill_dict = self._build_bill(bill_data)
 
-        result = self.collection.insert_one(bill_dict)
+        try:
+            result = await self.collection.insert_one(bill_dict)
+        except DuplicateKeyError:
+            raise ValueError("A bill for this month already exists for this user")
+        await version_stamps.bump(bills_version_key(bill_data.user_id))
+        await stats_service.record_bill_status(bill_dict["month"], bill_dict["amount"], None, bill_dict["status"])
         bill_dict["_id"] = result.inserted_id
         return self._format_bill(bill_dict)
 
-    def get_bills_by_user(self, user_id: str) -> List[dict]:
+    async def run_batch(self, operations: List[Any]) -> List[dict]:
+        """Apply many bill creates and status updates with one unordered bulk_write
+
+        Each operation is {"op": "create", <BillCreate fields>} or
+        {"op": "update", "bill_id": ..., <BillUpdate fields>}. Works like
+        TaskService.run_batch; a create for a month the customer is already
+        billed for fails on the unique (user_id, month) index. Archived bills
+        cannot be updated and report not_found.
+        """
+        results, valid = validate_operations(operations, {
+            "create": lambda fields: BillCreate(**fields),
+            "update": lambda fields: (parse_object_id(fields.get("bill_id"), "bill_id"), BillUpdate(**fields)),
+        })
+        updates = [(index, *update) for index, op, update in valid if op == "update"]
+
+        current = {}
+        if updates:
+            documents = self.collection.find(
+                {"_id": {"$in": [bill_id for _, bill_id, _ in updates]}},
+                {"user_id": 1, "month": 1, "amount": 1, "status": 1}
+            )
+            current = {bill["_id"]: bill async for bill in documents}
+
+        requests = []
+        new_bills = {}
+        for index, op, bill_data in valid:
+            if op == "create":
+                document = self._build_bill(bill_data)
+                document["_id"] = ObjectId()
+                requests.append((index, InsertOne(document)))
+                new_bills[index] = document
+
+        changes = {}
+        seen = set()
+        marker = batch_marker()
+        for index, bill_id, update in updates:
+            results[index]["bill_id"] = str(bill_id)
+            bill = current.get(bill_id)
+            if bill_id in seen:
+                # Unordered writes to one document could land in either order
+                results[index].update(status="invalid", error="bill_id: appears more than once in the batch")
+            elif bill is None:
+                results[index]["status"] = "not_found"
+            elif update.status is None or bill["status"] == update.status:
+                results[index]["status"] = "unchanged"
+            else:
+                fields = {"status": update.status, "updated_at": marker}
+                if update.status == "Paid":
+                    # Same record of the payment as pay_bill
+                    fields["paid_at"] = datetime.utcnow()
+                # Conditional on the status read above, so a concurrent change is not overwritten or miscounted
+                requests.append((index, UpdateOne({"_id": bill_id, "status": bill["status"]}, {"$set": fields})))
+                changes[index] = (bill, update.status)
+            seen.add(bill_id)
+
+        matched, errors = await run_bulk_write(self.collection, requests)
+        for index, error in errors.items():
+            message = "A bill for this month already exists for this user" if error.get("code") == 11000 else error.get("errmsg", "Write failed")
+            results[index].update(status="failed", error=message)
+        conflicts = await unapplied_updates(
+            self.collection,
+            {index: bill["_id"] for index, (bill, _) in changes.items() if index not in errors},
+            matched,
+            marker
+        )
+        for index in conflicts:
+            results[index].update(status="failed", error=CONFLICT_ERROR)
+
+        transitions = []
+        for index, document in new_bills.items():
+            if index not in errors:
+                results[index].update(status="created", bill_id=str(document["_id"]))
+                transitions.append((document, None, document["status"]))
+        for index, (bill, status) in changes.items():
+            if index not in errors and index not in conflicts:
+                results[index]["status"] = "updated"
+                transitions.append((bill, bill["status"], status))
+
+        if transitions:
+            await version_stamps.bump_many(bills_version_key(bill["user_id"]) for bill, _, _ in transitions)
+            await stats_service.record_bill_transitions(
+                (bill["month"], bill["amount"], old_status, new_status) for bill, old_status, new_status in transitions
+            )
+        return results
+
+    async def run_monthly_billing(self, year: int, month: int, batch_size: int = 1000) -> dict:
+        """Create the given month's bill for every customer
+
+        Customers are streamed from the users collection and bills are written with
+        chunked unordered insert_many calls. The unique (user_id, month) index makes
+        the run idempotent: re-running after a crash skips bills that already exist.
+        Raises ValueError if that index is missing, e.g. because duplicates kept it
+        from being built.
+        """
+        if "user_id_month_unique" not in await self.collection.index_information():
+            raise ValueError(
+                "The unique bills (user_id, month) index is missing, so a run could bill customers twice; "
+                "resolve duplicates with `python manage.py indexes duplicates`, then run `python manage.py indexes apply`"
+            )
+        started = time.perf_counter()
+        billing_month = date(year, month, 1)
+        month_label = billing_month.strftime("%B %Y")
+        next_month = date(year + month // 12, month % 12 + 1, 1)
+        due_date = self._due_datetime(next_month.replace(day=settings.BILL_DUE_DAY))
+        pdf_filename = self._pdf_filename(month_label)
+
+        stats = {"month": month_label, "customers": 0, "created": 0, "existing": 0, "unpriced": 0}
+        batch = []
+
+        async def flush():
+            if not batch:
+                return
+            try:
+                result = await self.collection.insert_many(batch, ordered=False)
+                stats["created"] += len(result.inserted_ids)
+            except BulkWriteError as e:
+                duplicates = [error for error in e.details["writeErrors"] if error["code"] == 11000]
+                if len(duplicates) != len(e.details["writeErrors"]):
+                    raise
+                stats["created"] += e.details["nInserted"]
+                stats["existing"] += len(duplicates)
+            await version_stamps.bump_many(bills_version_key(bill["user_id"]) for bill in batch)
+            batch.clear()
+
+        customers = get_collection("users").find(
+            {"role": "customer"}, {"plan": 1}
+        ).batch_size(batch_size)
+        async for customer in customers:
+            stats["customers"] += 1
+            amount = self._monthly_amount(customer.get("plan"))
+            if amount is None:
+                stats["unpriced"] += 1
+                continue
+
+            batch.append({
+                "user_id": str(customer["_id"]),
+                "month": month_label,
+                "amount": amount,
+                "due_date": due_date,
+                "status": "Due",
+                "pdf_filename": pdf_filename,
+                "created_at": datetime.utcnow()
+            })
+            if len(batch) >= batch_size:
+                await flush()
+        await flush()
+        if stats["created"]:
+            await stats_service.rebuild_counters(tasks=False)
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        stats["bills_per_sec"] = round(stats["created"] / stats["seconds"], 1) if stats["seconds"] else 0.0
+        return stats
+
+    async def get_bills_by_user(self, user_id: str) -> List[dict]:
         """Get all bills for a user"""
-        bills = self.collection.find({"user_id": user_id})
-        return [self._format_bill(bill) for bill in bills]
+        return [self._format_bill(bill) async for bill in self.iter_bills_by_user(user_id)]
+
+    async def get_bills_page(
+        self,
+        user_id: str,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of a user's bills, newest first, and the cursor for the next page
+
+        Documents are returned as stored (with _id), projected to the response
+        fields, so they can be validated straight into BillResponse. Archived
+        bills are all older than the archive watermark, so the archive is only
+        read for pages that reach past it.
+        """
+        query = keyset_filter(cursor)
+        query["user_id"] = user_id
+
+        documents = self.collection.find(query, BILL_RESPONSE_PROJECTION).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).limit(limit + 1)
+        bills = await documents.to_list(length=limit + 1)
+
+        watermark = await self._archive_watermark()
+        if watermark and not (len(bills) > limit and bills[limit - 1]["created_at"] >= watermark):
+            after = decode_cursor(cursor) if cursor else None
+            archived = await self._archived_bills(user_id, after, limit + 1)
+            # A crashed archive run can leave a bill in both places until it is re-run
+            hot_ids = {bill["_id"] for bill in bills}
+            archived = [bill for bill in archived if bill["_id"] not in hot_ids]
+            bills = heapq.nlargest(limit + 1, bills + archived, key=_sort_key)
+
+        next_cursor = None
+        if len(bills) > limit:
+            bills = bills[:limit]
+            next_cursor = encode_cursor(bills[-1]["created_at"], bills[-1]["_id"])
+        return bills, next_cursor
+
+    async def iter_bills_by_user(self, user_id: str, batch_size: int = 500) -> AsyncIterator[dict]:
+        """Stream every bill for a user as raw documents, newest first, batch_size per round trip
+
+        Hot bills newer than the archive watermark come first; older hot bills
+        are then merged with the customer's archive buckets, one year at a time.
+        """
+        documents = self.collection.find({"user_id": user_id}, BILL_RESPONSE_PROJECTION).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).batch_size(batch_size)
+        watermark = await self._archive_watermark()
+        if not watermark:
+            async for bill in documents:
+                yield bill
+            return
 
-    def get_bill_by_id(self, bill_id: str) -> dict:
+        # Bills left behind the watermark are few: unpaid, or not archived yet
+        older = []
+        async for bill in documents:
+            if bill["created_at"] >= watermark:
+                yield bill
+            else:
+                older.append(bill)
+
+        older_ids = {bill["_id"] for bill in older}
+        buckets = self.archive.find({"user_id": user_id}, ARCHIVE_PROJECTION).sort("year", -1)
+        async for bucket in buckets:
+            year_start = datetime(bucket["year"], 1, 1)
+            merged = [bill for bill in self._unbucket(user_id, bucket) if bill["_id"] not in older_ids]
+            while older and older[0]["created_at"] >= year_start:
+                merged.append(older.pop(0))
+            for bill in sorted(merged, key=_sort_key, reverse=True):
+                yield bill
+        for bill in older:
+            yield bill
+
+    async def iter_bills_by_month(self, month: str, batch_size: int = 500) -> AsyncIterator[dict]:
+        """Stream every bill of a billing month (e.g. "November 2024") as raw documents"""
+        documents = self.collection.find({"month": month}, BILL_RESPONSE_PROJECTION).batch_size(batch_size)
+        async for bill in documents:
+            yield bill
+
+    async def get_bill_by_id(self, bill_id: str) -> dict:
         """Get a bill by ID"""
         try:
-            bill = self.collection.find_one({"_id": ObjectId(bill_id)})
+            object_id = ObjectId(bill_id)
+            bill = await self.collection.find_one({"_id": object_id})
+            if bill is None:
+                bucket = await self.archive.find_one(
+                    {"bills._id": object_id},
+                    {"user_id": 1, "bills": {"$elemMatch": {"_id": object_id}}}
+                )
+                bill = self._unbucket(bucket["user_id"], bucket)[0] if bucket else None
             return self._format_bill(bill) if bill else None
         except:
             return None
 
-    def update_bill_status(self, bill_id: str, status: str) -> dict:
+    async def update_bill_status(self, bill_id: str, status: str) -> dict:
         """Update bill status"""
         try:
-            result = self.collection.find_one_and_update(
+            # The previous status is needed to move the dashboard counters
+            result = await self.collection.find_one_and_update(
                 {"_id": ObjectId(bill_id)},
                 {"$set": {"status": status}},
-                return_document=True
+                return_document=ReturnDocument.BEFORE
             )
+            if result:
+                previous_status, result["status"] = result["status"], status
+                await version_stamps.bump(bills_version_key(result["user_id"]))
+                await stats_service.record_bill_status(result["month"], result["amount"], previous_status, status)
             return self._format_bill(result) if result else None
         except:
             return None
 
+    async def pay_bill(self, bill_id: str, user_id: str) -> Optional[dict]:
+        """Mark a customer's unpaid bill as Paid in one atomic round trip
+
+        Returns None when no bill matches: it does not exist, belongs to someone
+        else, or is already Paid. Concurrent payments of one bill cannot both win.
+        """
+        try:
+            object_id = ObjectId(bill_id)
+        except Exception:
+            return None
+        result = await self.collection.find_one_and_update(
+            {"_id": object_id, "user_id": user_id, "status": {"$ne": "Paid"}},
+            {"$set": {"status": "Paid", "paid_at": datetime.utcnow()}},
+            projection=BILL_RESPONSE_PROJECTION,
+            return_document=ReturnDocument.BEFORE
+        )
+        if result is None:
+            return None
+        previous_status, result["status"] = result["status"], "Paid"
+        await version_stamps.bump(bills_version_key(user_id))
+        await stats_service.record_bill_status(result["month"], result["amount"], previous_status, "Paid")
+        return result
+
+    async def mark_overdue(self, today: Optional[date] = None, batch_size: int = 1000) -> dict:
+        """Flip every Due bill whose due date has passed to Overdue
+
+        Each batch is one indexed find on (status, due_date), one update_many and
+        one bulk version bump for the affected customers, so a sweep costs three
+        round trips per batch_size bills.
+        """
+        started = time.perf_counter()
+        cutoff = self._due_datetime(today or datetime.utcnow().date())
+        query = {"status": "Due", "due_date": {"$lt": cutoff}}
+
+        stats = {"updated": 0, "batches": 0}
+        while True:
+            documents = self.collection.find(query, {"_id": 1, "user_id": 1}).limit(batch_size)
+            bills = await documents.to_list(length=batch_size)
+            if not bills:
+                break
+            bill_ids = [bill["_id"] for bill in bills]
+            # Re-check the status so a bill paid in the meantime is left alone
+            result = await self.collection.update_many(
+                {"_id": {"$in": bill_ids}, "status": "Due"},
+                {"$set": {"status": "Overdue"}}
+            )
+            stats["updated"] += result.modified_count
+            stats["batches"] += 1
+            await version_stamps.bump_many(bills_version_key(bill["user_id"]) for bill in bills)
+        if stats["updated"]:
+            await stats_service.rebuild_counters(tasks=False)
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    async def migrate_due_dates(self, batch_size: int = 1000) -> int:
+        """Convert legacy string due dates (YYYY-MM-DD) to BSON dates; returns documents migrated"""
+        migrated = 0
+        while True:
+            documents = self.collection.find({"due_date": {"$type": "string"}}, {"due_date": 1}).limit(batch_size)
+            bills = await documents.to_list(length=batch_size)
+            if not bills:
+                break
+            result = await self.collection.bulk_write([
+                UpdateOne(
+                    {"_id": bill["_id"]},
+                    {"$set": {"due_date": self._due_datetime(date.fromisoformat(bill["due_date"]))}}
+                )
+                for bill in bills
+            ], ordered=False)
+            migrated += result.modified_count
+        return migrated
+
+    async def archive_paid_bills(self, older_than_days: Optional[int] = None, batch_size: int = 1000) -> dict:
+        """Move Paid bills created before the horizon into per-customer yearly buckets
+
+        The watermark is raised before anything moves, so readers always know
+        to look in the archive. Each batch upserts the buckets ($addToSet, so a
+        re-run after a crash never duplicates a bill), then deletes the hot
+        copies that are still Paid and bumps the owners' bill versions.
+        """
+        started = time.perf_counter()
+        days = settings.BILL_ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+        cutoff = datetime.utcnow().replace(microsecond=0) - timedelta(days=days)
+        await version_stamps.raise_to(BILLS_ARCHIVE_WATERMARK_KEY, calendar.timegm(cutoff.utctimetuple()))
+        query = {"status": "Paid", "created_at": {"$lt": cutoff}}
+
+        stats = {"cutoff": cutoff.isoformat(), "archived": 0, "batches": 0}
+        while True:
+            documents = self.collection.find(query).limit(batch_size)
+            bills = await documents.to_list(length=batch_size)
+            if not bills:
+                break
+
+            buckets = {}
+            for bill in bills:
+                user_id = bill.pop("user_id")
+                buckets.setdefault((user_id, bill["created_at"].year), []).append(bill)
+            await self.archive.bulk_write([
+                UpdateOne(
+                    {"_id": f"{user_id}:{year}"},
+                    {
+                        "$setOnInsert": {"user_id": user_id, "year": year},
+                        "$addToSet": {"bills": {"$each": archived}},
+                        "$set": {"updated_at": datetime.utcnow()}
+                    },
+                    upsert=True
+                )
+                for (user_id, year), archived in buckets.items()
+            ], ordered=False)
+
+            result = await self.collection.delete_many(
+                {"_id": {"$in": [bill["_id"] for bill in bills]}, "status": "Paid"}
+            )
+            stats["archived"] += result.deleted_count
+            stats["batches"] += 1
+            await version_stamps.bump_many(bills_version_key(user_id) for user_id, _ in buckets)
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    async def _archive_watermark(self) -> Optional[datetime]:
+        """Every archived bill was created before this time; None if nothing was ever archived"""
+        seconds = await version_stamps.get(BILLS_ARCHIVE_WATERMARK_KEY)
+        return datetime.utcfromtimestamp(seconds) if seconds else None
+
+    async def _archived_bills(
+        self,
+        user_id: str,
+        after: Optional[Tuple[datetime, ObjectId]],
+        limit: int
+    ) -> List[dict]:
+        """At least limit archived bills after the cursor position (all of them if fewer), newest first"""
+        query = {"user_id": user_id}
+        if after:
+            query["year"] = {"$lte": after[0].year}
+        bills = []
+        async for bucket in self.archive.find(query, ARCHIVE_PROJECTION).sort("year", -1):
+            bills.extend(
+                bill for bill in self._unbucket(user_id, bucket)
+                if after is None or _sort_key(bill) < after
+            )
+            # Buckets are whole years, so once one fills the page older years cannot rank higher
+            if len(bills) >= limit:
+                break
+        return sorted(bills, key=_sort_key, reverse=True)
+
+    def _unbucket(self, user_id: str, bucket: dict) -> List[dict]:
+        """Archived bills of a bucket as hot-collection documents"""
+        return [{**bill, "user_id": user_id} for bill in bucket.get("bills", [])]
+
+    def _build_bill(self, bill_data: BillCreate) -> dict:
+        """Build a bill document from validated input"""
+        return {
+            "user_id": bill_data.user_id,
+            "month": bill_data.month,
+            "amount": bill_data.amount,
+            "due_date": self._due_datetime(bill_data.due_date),
+            "status": bill_data.status,
+            "pdf_filename": self._pdf_filename(bill_data.month),
+            "created_at": datetime.utcnow()
+        }
+
+    def _due_datetime(self, due_date: date) -> datetime:
+        """BSON has no date-only type, so due dates are stored as midnight UTC"""
+        return datetime.combine(due_date, datetime_time.min)
+
+    def _monthly_amount(self, plan: Optional[str]) -> Optional[float]:
+        """Monthly amount including GST, rounded to whole rupees; None for unknown plans"""
+        price = settings.PLAN_MONTHLY_PRICES.get(plan)
+        if price is None:
+            return None
+        return float(round(price * (1 + settings.GST_RATE)))
+
+    def _pdf_filename(self, month: str) -> str:
+        return f"invoice_{month.replace(' ', '_').lower()}.pdf"
+
     def _format_bill(self, bill: dict) -> dict:
         """Format bill document from MongoDB"""
         if not bill:
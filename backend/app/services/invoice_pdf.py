@@ -0,0 +1,111 @@
+"""
+Invoice PDF rendering
+
+A small, dependency-free PDF writer for one-page invoices. It only uses the
+standard Helvetica fonts, so no font files are embedded, and it writes no
+timestamps: the same invoice data always renders to the same bytes. These
+functions run in worker processes, so they take and return plain data.
+"""
+from typing import List, Tuple
+
+PAGE_WIDTH = 595  # A4 in points
+PAGE_HEIGHT = 842
+MARGIN = 56
+
+# (font, size, x, y, text); font is "F1" (Helvetica) or "F2" (Helvetica-Bold)
+TextLine = Tuple[str, int, float, float, str]
+
+
+def _escape(text: str) -> str:
+    text = text.encode("latin-1", errors="replace").decode("latin-1")
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def _money(amount: float) -> str:
+    return f"Rs. {amount:,.2f}"
+
+
+def _text_width(text: str, size: int) -> float:
+    # Helvetica averages about half an em per character; good enough for right alignment
+    return len(text) * size * 0.5
+
+
+def invoice_lines(invoice: dict) -> List[TextLine]:
+    """Lay out the invoice text; invoice is the dict built by InvoiceService._invoice_data"""
+    right = PAGE_WIDTH - MARGIN
+    lines: List[TextLine] = [
+        ("F2", 20, MARGIN, 780, invoice["company"]),
+        ("F1", 10, MARGIN, 764, "Tax Invoice"),
+        ("F2", 12, MARGIN, 720, "Billed to"),
+        ("F1", 11, MARGIN, 704, invoice["customer_name"]),
+        ("F1", 11, MARGIN, 690, f"Mobile: {invoice['customer_mobile']}"),
+        ("F1", 11, MARGIN, 676, invoice["customer_address"]),
+    ]
+
+    details = [
+        ("Invoice no.", invoice["invoice_number"]),
+        ("Billing month", invoice["month"]),
+        ("Due date", invoice["due_date"]),
+        ("Status", invoice["status"]),
+    ]
+    y = 720
+    for label, value in details:
+        lines.append(("F1", 10, 340, y, label))
+        lines.append(("F2", 10, right - _text_width(value, 10), y, value))
+        y -= 16
+
+    y = 610
+    lines.append(("F2", 11, MARGIN, y, "Description"))
+    lines.append(("F2", 11, right - _text_width("Amount", 11), y, "Amount"))
+    rows = [
+        (f"Broadband plan: {invoice['plan']}", invoice["subtotal"]),
+        (f"GST @ {invoice['gst_percent']}%", invoice["gst"]),
+    ]
+    for description, amount in rows:
+        y -= 22
+        lines.append(("F1", 11, MARGIN, y, description))
+        lines.append(("F1", 11, right - _text_width(_money(amount), 11), y, _money(amount)))
+
+    y -= 30
+    total = _money(invoice["total"])
+    lines.append(("F2", 13, MARGIN, y, "Total"))
+    lines.append(("F2", 13, right - _text_width(total, 13), y, total))
+
+    lines.append(("F1", 9, MARGIN, 80, "This is a computer generated invoice and does not require a signature."))
+    return lines
+
+
+def _content_stream(lines: List[TextLine]) -> bytes:
+    commands = ["0.8 w", f"{MARGIN} 625 m {PAGE_WIDTH - MARGIN} 625 l S"]
+    for font, size, x, y, text in lines:
+        commands.append(f"BT /{font} {size} Tf {x:.1f} {y:.1f} Td ({_escape(text)}) Tj ET")
+    return "\n".join(commands).encode("latin-1")
+
+
+def render_invoice_pdf(invoice: dict) -> bytes:
+    """Render an invoice to PDF bytes"""
+    content = _content_stream(invoice_lines(invoice))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /Font << /F1 5 0 R /F2 6 0 R >> >> /Contents 4 0 R >>"
+        ).encode(),
+        b"<< /Length " + str(len(content)).encode() + b" >>\nstream\n" + content + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica-Bold /Encoding /WinAnsiEncoding >>",
+    ]
+
+    pdf = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += f"{number} 0 obj\n".encode() + body + b"\nendobj\n"
+
+    xref_offset = len(pdf)
+    pdf += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    for offset in offsets:
+        pdf += f"{offset:010d} 00000 n \n".encode()
+    pdf += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return bytes(pdf)
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.services.bill_service import bill_service
+from app.services.invoice_pdf import render_invoice_pdf
+from app.services.user_service import user_service
+
+# Part of every cache key; bump it when the invoice layout changes
+RENDERER_VERSION = 1
+
+
+class InvoiceService:
+    """Renders invoice PDFs on a process pool and caches them on disk by content hash
+
+    The cache key is a hash of everything printed on the invoice, so a bill
+    that changes (e.g. gets paid) simply maps to a new file and stale files age
+    out. When the cache grows past max_bytes the least recently served files
+    are evicted. Concurrent requests for the same invoice share one render.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int, workers: int):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.hits = 0
+        self.misses = 0
+        self.renders = 0
+        self.evictions = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    async def get_invoice(self, bill: dict, customer: dict) -> Tuple[Path, str]:
+        """Return the cached PDF path for a bill, rendering it first if needed, and its cache key"""
+        path, key, _ = await self._get_invoice(bill, customer)
+        return path, key
+
+    async def _get_invoice(self, bill: dict, customer: dict) -> Tuple[Path, str, bool]:
+        invoice = self._invoice_data(bill, customer)
+        key = self.cache_key(invoice)
+        path = self._path(key)
+
+        if await asyncio.to_thread(self._touch, path):
+            self.hits += 1
+            return path, key, True
+
+        self.misses += 1
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._render_to_cache(invoice, path))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # A client disconnecting must not cancel a render other requests are waiting on
+        await asyncio.shield(future)
+        return path, key, False
+
+    async def prerender_month(self, month: str, batch_size: int = 500) -> dict:
+        """Warm the cache with every invoice of a billing month, e.g. right after a billing run"""
+        started = time.perf_counter()
+        stats = {"month": month, "bills": 0, "rendered": 0, "cached": 0, "skipped": 0}
+        semaphore = asyncio.Semaphore(self.workers * 2)
+
+        async def warm(bill: dict, customer: Optional[dict]):
+            if customer is None:
+                stats["skipped"] += 1
+                return
+            async with semaphore:
+                _, _, cached = await self._get_invoice(bill, customer)
+                stats["cached" if cached else "rendered"] += 1
+
+        batch = []
+
+        async def flush():
+            customers = await user_service.get_users_by_ids({bill["user_id"] for bill in batch})
+            await asyncio.gather(*(warm(bill, customers.get(bill["user_id"])) for bill in batch))
+            batch.clear()
+
+        async for bill in bill_service.iter_bills_by_month(month, batch_size=batch_size):
+            stats["bills"] += 1
+            batch.append(bill)
+            if len(batch) >= batch_size:
+                await flush()
+        if batch:
+            await flush()
+
+        stats["seconds"] = round(time.perf_counter() - started, 3)
+        return stats
+
+    def cache_key(self, invoice: dict) -> str:
+        payload = json.dumps({"v": RENDERER_VERSION, **invoice}, sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def stats(self) -> dict:
+        """Return cache hit/miss, render and eviction counters"""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "renders": self.renders,
+            "evictions": self.evictions,
+            "in_flight": len(self._in_flight),
+            "size_bytes": self._size or 0,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the render pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    async def _render_to_cache(self, invoice: dict, path: Path) -> None:
+        loop = asyncio.get_running_loop()
+        pdf = await loop.run_in_executor(self._get_executor(), render_invoice_pdf, invoice)
+        self.renders += 1
+        await asyncio.to_thread(self._store, path, pdf)
+
+    def _invoice_data(self, bill: dict, customer: dict) -> dict:
+        """Everything printed on the invoice, as JSON-safe values"""
+        due_date = bill["due_date"]
+        total = float(bill["amount"])
+        subtotal = round(total / (1 + settings.GST_RATE), 2)
+        return {
+            "company": settings.PROJECT_NAME,
+            "invoice_number": str(bill.get("id") or bill["_id"]).upper(),
+            "month": bill["month"],
+            "due_date": due_date if isinstance(due_date, str) else due_date.strftime("%d %b %Y"),
+            "status": bill["status"],
+            "customer_name": customer.get("name") or "-",
+            "customer_mobile": customer.get("mobile") or "-",
+            "customer_address": customer.get("address") or "-",
+            "plan": customer.get("plan") or "-",
+            "gst_percent": round(settings.GST_RATE * 100, 2),
+            "subtotal": subtotal,
+            "gst": round(total - subtotal, 2),
+            "total": total,
+        }
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.pdf"
+
+    def _touch(self, path: Path) -> bool:
+        """Mark a cached file as recently used; False if it is not cached"""
+        try:
+            os.utime(path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def _store(self, path: Path, pdf: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temporary.write_bytes(pdf)
+        os.replace(temporary, path)
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan()[1]
+            else:
+                self._size += len(pdf)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _scan(self):
+        files = []
+        for file in self.cache_dir.glob("*/*.pdf"):
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, file))
+        return files, sum(size for _, size, _ in files)
+
+    def _evict(self) -> None:
+        """Delete least recently used files until the cache is below 90% of max_bytes"""
+        files, size = self._scan()
+        target = self.max_bytes * 0.9
+        for _, file_size, file in sorted(files):
+            if size <= target:
+                break
+            try:
+                file.unlink()
+                self.evictions += 1
+            except FileNotFoundError:
+                pass
+            size -= file_size
+        self._size = size
+
+
+invoice_service = InvoiceService(
+    cache_dir=settings.INVOICE_CACHE_DIR,
+    max_bytes=settings.INVOICE_CACHE_MAX_BYTES,
+    workers=settings.INVOICE_RENDER_WORKERS
+)
@@ -0,0 +1,68 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+from app.core.config import settings
+from app.services.bill_service import bill_service
+
+
+class OverdueSweeper:
+    """Background job that periodically marks past-due bills as Overdue"""
+
+    def __init__(self, interval_seconds: int, batch_size: int):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.sweeps = 0
+        self.total_updated = 0
+        self.last_run: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def sweep(self) -> dict:
+        """Run a single sweep and record its timing and count"""
+        result = await bill_service.mark_overdue(batch_size=self.batch_size)
+        result["finished_at"] = datetime.utcnow()
+        self.sweeps += 1
+        self.total_updated += result["updated"]
+        self.last_run = result
+        return result
+
+    async def _run_forever(self):
+        while True:
+            try:
+                result = await self.sweep()
+                print(f"🧹 Overdue sweep: {result['updated']} bills marked Overdue in {result['seconds']}s")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"⚠️  Overdue sweep failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self):
+        """Start sweeping in the background on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        """Cancel the background task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        """Return sweep counters and the last sweep's result"""
+        return {
+            "sweeps": self.sweeps,
+            "total_updated": self.total_updated,
+            "last_updated": self.last_run["updated"] if self.last_run else 0,
+            "last_seconds": self.last_run["seconds"] if self.last_run else 0.0,
+            "last_run": self.last_run,
+        }
+
+
+overdue_sweeper = OverdueSweeper(
+    interval_seconds=settings.OVERDUE_SWEEP_INTERVAL_SECONDS,
+    batch_size=settings.OVERDUE_SWEEP_BATCH_SIZE
+)
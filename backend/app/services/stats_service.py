@@ -0,0 +1,214 @@
+import re
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import get_collection
+from app.schemas.bill import MONTH_PATTERN
+
+
+TASK_STATUSES = ["Pending Installation", "Installation Scheduled", "Completed"]
+OUTSTANDING_STATUSES = ["Due", "Overdue"]
+
+TASKS_COUNTER_ID = "tasks"
+BILLS_COUNTER_ID = "bills"
+
+# Months become field names in the bills counter; anything else ("." or "$") would break the path
+MONTH_KEY_PATTERN = re.compile(MONTH_PATTERN)
+
+
+class StatsService:
+    """Dashboard statistics for tasks and billing
+
+    By default the numbers come from aggregation pipelines over tasks and
+    bills, cached for STATS_CACHE_TTL_SECONDS. With STATS_USE_COUNTERS the
+    dashboard instead reads two small pre-aggregated documents from
+    stats_counters, kept up to date incrementally by single-document writes
+    and rebuilt after bulk jobs (billing runs, overdue sweeps).
+
+    A counter document only takes increments once a rebuild has seeded it
+    (seeded_at), and a missing or unseeded one is rebuilt before it is
+    read, so turning the flag on against existing data never serves
+    partial counts. Bills whose month is not a "November 2024" style label
+    are left out of the counters.
+    """
+
+    def __init__(self):
+        self._cache = TTLCache(maxsize=1, ttl=settings.STATS_CACHE_TTL_SECONDS)
+
+    @property
+    def counters(self) -> AsyncIOMotorCollection:
+        return get_collection("stats_counters")
+
+    async def get_dashboard(self) -> dict:
+        """Task and billing summary, served from a short-TTL cache"""
+        dashboard = self._cache.get("dashboard")
+        if dashboard is None:
+            if settings.STATS_USE_COUNTERS:
+                task_counts, bill_months = await self._read_counters()
+            else:
+                task_counts, bill_months = await self.aggregate_tasks(), await self.aggregate_bills()
+            dashboard = {
+                "tasks": self._task_stats(task_counts),
+                "billing": self._billing_stats(bill_months),
+                "generated_at": datetime.utcnow()
+            }
+            self._cache.set("dashboard", dashboard)
+        return dashboard
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters of the dashboard cache"""
+        return self._cache.stats()
+
+    async def aggregate_tasks(self) -> Dict[str, int]:
+        """Task counts per status"""
+        pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
+        return {row["_id"]: row["count"] async for row in get_collection("tasks").aggregate(pipeline)}
+
+    async def aggregate_bills(self) -> Dict[str, Dict[str, dict]]:
+        """Outstanding bill counts and amounts per month and status"""
+        pipeline = [
+            {"$match": {"status": {"$in": OUTSTANDING_STATUSES}}},
+            {"$group": {
+                "_id": {"month": "$month", "status": "$status"},
+                "count": {"$sum": 1},
+                "amount": {"$sum": "$amount"}
+            }},
+        ]
+        months: Dict[str, Dict[str, dict]] = {}
+        async for row in get_collection("bills").aggregate(pipeline):
+            months.setdefault(row["_id"]["month"], {})[row["_id"]["status"]] = {
+                "count": row["count"],
+                "amount": row["amount"]
+            }
+        return months
+
+    async def record_task_status(self, old_status: Optional[str], new_status: Optional[str], count: int = 1) -> None:
+        """Apply a task status transition to the counters (None means created/removed)"""
+        await self.record_task_transitions([(old_status, new_status)] * count)
+
+    async def record_task_transitions(self, transitions: Iterable[Tuple[Optional[str], Optional[str]]]) -> None:
+        """Apply many (old, new) task status transitions with one counters write"""
+        if not settings.STATS_USE_COUNTERS:
+            return
+        increments = defaultdict(int)
+        for old_status, new_status in transitions:
+            if old_status == new_status:
+                continue
+            if old_status:
+                increments[f"status.{old_status}"] -= 1
+            if new_status:
+                increments[f"status.{new_status}"] += 1
+        await self._increment(TASKS_COUNTER_ID, increments)
+
+    async def record_bill_status(self, month: str, amount: float, old_status: Optional[str], new_status: Optional[str]) -> None:
+        """Apply a bill status transition to the counters; only outstanding statuses are tracked"""
+        await self.record_bill_transitions([(month, amount, old_status, new_status)])
+
+    async def record_bill_transitions(
+        self,
+        transitions: Iterable[Tuple[str, float, Optional[str], Optional[str]]]
+    ) -> None:
+        """Apply many (month, amount, old, new) bill status transitions with one counters write"""
+        if not settings.STATS_USE_COUNTERS:
+            return
+        increments = defaultdict(int)
+        for month, amount, old_status, new_status in transitions:
+            if old_status == new_status:
+                continue
+            if not MONTH_KEY_PATTERN.match(month):
+                continue
+            if old_status in OUTSTANDING_STATUSES:
+                increments[f"months.{month}.{old_status}.count"] -= 1
+                increments[f"months.{month}.{old_status}.amount"] -= amount
+            if new_status in OUTSTANDING_STATUSES:
+                increments[f"months.{month}.{new_status}.count"] += 1
+                increments[f"months.{month}.{new_status}.amount"] += amount
+        await self._increment(BILLS_COUNTER_ID, increments)
+
+    async def rebuild_counters(self, tasks: bool = True, bills: bool = True) -> None:
+        """Recompute the pre-aggregated counters from the source collections"""
+        if not settings.STATS_USE_COUNTERS:
+            return
+        if tasks:
+            await self.counters.replace_one(
+                {"_id": TASKS_COUNTER_ID},
+                {"status": await self.aggregate_tasks(), "seeded_at": datetime.utcnow()},
+                upsert=True
+            )
+        if bills:
+            months = {month: statuses for month, statuses in (await self.aggregate_bills()).items() if MONTH_KEY_PATTERN.match(month)}
+            await self.counters.replace_one(
+                {"_id": BILLS_COUNTER_ID}, {"months": months, "seeded_at": datetime.utcnow()}, upsert=True
+            )
+
+    async def ensure_counters(self) -> List[str]:
+        """Seed counter documents that were never rebuilt; returns the ids it rebuilt"""
+        if not settings.STATS_USE_COUNTERS:
+            return []
+        seeded = {document["_id"] async for document in self.counters.find(
+            {"_id": {"$in": [TASKS_COUNTER_ID, BILLS_COUNTER_ID]}, "seeded_at": {"$exists": True}}, {"_id": 1}
+        )}
+        missing = [counter_id for counter_id in (TASKS_COUNTER_ID, BILLS_COUNTER_ID) if counter_id not in seeded]
+        if missing:
+            await self.rebuild_counters(tasks=TASKS_COUNTER_ID in missing, bills=BILLS_COUNTER_ID in missing)
+        return missing
+
+    async def _increment(self, counter_id: str, increments: Dict[str, float]) -> None:
+        increments = {key: value for key, value in increments.items() if value}
+        if increments:
+            # Before the first rebuild there is nothing correct to add to; the rebuild will count it
+            await self.counters.update_one({"_id": counter_id, "seeded_at": {"$exists": True}}, {"$inc": increments})
+
+    async def _read_counters(self):
+        documents = {document["_id"]: document async for document in self.counters.find(
+            {"_id": {"$in": [TASKS_COUNTER_ID, BILLS_COUNTER_ID]}}
+        )}
+        if any("seeded_at" not in documents.get(counter_id, {}) for counter_id in (TASKS_COUNTER_ID, BILLS_COUNTER_ID)):
+            await self.ensure_counters()
+            documents = {document["_id"]: document async for document in self.counters.find(
+                {"_id": {"$in": [TASKS_COUNTER_ID, BILLS_COUNTER_ID]}}
+            )}
+        task_counts = documents.get(TASKS_COUNTER_ID, {}).get("status", {})
+        bill_months = documents.get(BILLS_COUNTER_ID, {}).get("months", {})
+        return task_counts, bill_months
+
+    def _task_stats(self, counts: Dict[str, int]) -> dict:
+        by_status = {status: counts.get(status, 0) for status in TASK_STATUSES}
+        return {"total": sum(by_status.values()), "by_status": by_status}
+
+    def _billing_stats(self, months: Dict[str, Dict[str, dict]]) -> dict:
+        by_month: List[dict] = []
+        for month, statuses in months.items():
+            due = statuses.get("Due", {})
+            overdue = statuses.get("Overdue", {})
+            entry = {
+                "month": month,
+                "due_count": due.get("count", 0),
+                "overdue_count": overdue.get("count", 0),
+                "outstanding_amount": round(due.get("amount", 0) + overdue.get("amount", 0), 2),
+            }
+            if entry["due_count"] or entry["overdue_count"]:
+                by_month.append(entry)
+        by_month.sort(key=lambda entry: self._month_sort_key(entry["month"]), reverse=True)
+
+        return {
+            "outstanding_count": sum(entry["due_count"] + entry["overdue_count"] for entry in by_month),
+            "outstanding_amount": round(sum(entry["outstanding_amount"] for entry in by_month), 2),
+            "overdue_count": sum(entry["overdue_count"] for entry in by_month),
+            "overdue_amount": round(sum(
+                statuses.get("Overdue", {}).get("amount", 0) for statuses in months.values()
+            ), 2),
+            "by_month": by_month,
+        }
+
+    def _month_sort_key(self, month: str) -> datetime:
+        try:
+            return datetime.strptime(month, "%B %Y")
+        except ValueError:
+            return datetime.min
+
+
+stats_service = StatsService()
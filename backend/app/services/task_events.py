@@ -0,0 +1,81 @@
+import asyncio
+from typing import Optional
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.events import EventBus
+from app.schemas.task import TaskResponse
+
+
+TASK_CREATED = "task.created"
+TASK_STATUS_CHANGED = "task.status_changed"
+
+task_event_bus = EventBus(buffer_size=settings.TASK_EVENTS_BUFFER_SIZE)
+
+
+def publish_task_event(event_type: str, task: dict) -> None:
+    """Publish a task event from the request path
+
+    When the change stream source is enabled every worker receives events from
+    MongoDB instead, so publishing here as well would deliver them twice.
+    """
+    if settings.TASK_EVENTS_CHANGE_STREAM:
+        return
+    task_event_bus.publish(event_type, TaskResponse.model_validate(task).model_dump(mode="json"))
+
+
+class TaskChangeStream:
+    """Feeds the task event bus from a MongoDB change stream (replica sets only)
+
+    Each worker runs its own watcher, so clients connected to any worker see
+    changes made through every worker. The last resume token is kept so the
+    watcher picks up where it left off after a transient error.
+    """
+
+    def __init__(self):
+        self.resume_token: Optional[dict] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def _watch(self):
+        pipeline = [{"$match": {"$or": [
+            {"operationType": "insert"},
+            {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}},
+        ]}}]
+        async with get_collection("tasks").watch(
+            pipeline,
+            full_document="updateLookup",
+            resume_after=self.resume_token
+        ) as stream:
+            async for change in stream:
+                self.resume_token = stream.resume_token
+                task = change.get("fullDocument")
+                if task is None:
+                    continue
+                event_type = TASK_CREATED if change["operationType"] == "insert" else TASK_STATUS_CHANGED
+                task_event_bus.publish(event_type, TaskResponse.model_validate(task).model_dump(mode="json"))
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self._watch()
+            except asyncio.CancelledError:
+                raise
+            except PyMongoError as e:
+                print(f"⚠️  Task change stream interrupted: {e}")
+                await asyncio.sleep(1)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+task_change_stream = TaskChangeStream()
@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.config import settings
+from app.core.database import get_collection
+from app.core.write_buffer import WriteBehindBuffer
+
+# Percentiles reported for installation lead time
+LEAD_TIME_PERCENTILES = (50, 90, 95, 99)
+
+
+class TaskHistoryService:
+    """Append-only history of task creation and status changes in task_events
+
+    Events are written behind the request through a WriteBehindBuffer, so a
+    timeline can trail the tasks collection by up to
+    TASK_HISTORY_FLUSH_INTERVAL_SECONDS. Each event stores the task's new
+    status and the status it replaced; the created event has no previous status.
+    """
+
+    def __init__(self, buffer: WriteBehindBuffer):
+        self.buffer = buffer
+
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return get_collection("task_events")
+
+    def record(self, task: dict, previous_status: Optional[str] = None) -> None:
+        """Queue an event for a task that was just created or changed status"""
+        self.record_many([task], previous_status)
+
+    def record_many(self, tasks: List[dict], previous_status: Optional[str] = None) -> None:
+        now = datetime.utcnow()
+        self.buffer.add_many([
+            {
+                "task_id": task["_id"],
+                "status": task["status"],
+                "previous_status": previous_status,
+                # A created event is dated like the task itself so lead times start there
+                "at": task.get("created_at", now) if previous_status is None else now,
+            }
+            for task in tasks
+        ])
+
+    async def get_timelines(self, task_ids: List[str]) -> List[dict]:
+        """Status history of each task, oldest event first, and its time to completion"""
+        try:
+            object_ids = [ObjectId(task_id) for task_id in task_ids]
+        except Exception:
+            raise ValueError("Invalid task id")
+
+        pipeline = [
+            {"$match": {"task_id": {"$in": object_ids}}},
+            {"$sort": {"task_id": 1, "at": 1, "_id": 1}},
+            {"$group": {
+                "_id": "$task_id",
+                "events": {"$push": {"status": "$status", "previous_status": "$previous_status", "at": "$at"}},
+                "created_at": {"$first": "$at"},
+                "completed_at": {"$min": {"$cond": [{"$eq": ["$status", "Completed"]}, "$at", None]}},
+            }},
+        ]
+        timelines = {}
+        async for row in self.collection.aggregate(pipeline):
+            completed_at = row.get("completed_at")
+            timelines[row["_id"]] = {
+                "task_id": str(row["_id"]),
+                "events": row["events"],
+                "lead_time_seconds": (completed_at - row["created_at"]).total_seconds() if completed_at else None,
+            }
+        # Keep the requested order; tasks without history get an empty timeline
+        return [
+            timelines.get(object_id, {"task_id": str(object_id), "events": [], "lead_time_seconds": None})
+            for object_id in object_ids
+        ]
+
+    async def get_lead_times(
+        self,
+        from_status: str = "Pending Installation",
+        to_status: str = "Completed",
+        since_days: int = 90
+    ) -> dict:
+        """Percentiles of the time tasks took from first reaching from_status to first reaching to_status
+
+        Only tasks that reached from_status within the last since_days count.
+        The percentiles are nearest-rank values picked from the sorted durations
+        on the server, so only one small document comes back.
+        """
+        if from_status == to_status:
+            raise ValueError("from_status and to_status must differ")
+        since = datetime.utcnow() - timedelta(days=since_days)
+
+        ranks = {
+            # Nearest rank: the ceil(p/100 * n)-th smallest duration
+            f"p{percentile}_seconds": {"$arrayElemAt": ["$seconds", {"$toInt": {"$subtract": [
+                {"$ceil": {"$multiply": [percentile / 100, {"$size": "$seconds"}]}}, 1
+            ]}}]}
+            for percentile in LEAD_TIME_PERCENTILES
+        }
+        pipeline = [
+            {"$match": {"status": {"$in": [from_status, to_status]}, "at": {"$gte": since}}},
+            {"$group": {
+                "_id": "$task_id",
+                "started_at": {"$min": {"$cond": [{"$eq": ["$status", from_status]}, "$at", None]}},
+                "finished_at": {"$min": {"$cond": [{"$eq": ["$status", to_status]}, "$at", None]}},
+            }},
+            {"$match": {"started_at": {"$ne": None}, "finished_at": {"$ne": None}}},
+            {"$project": {"seconds": {"$divide": [{"$subtract": ["$finished_at", "$started_at"]}, 1000]}}},
+            {"$match": {"seconds": {"$gte": 0}}},
+            {"$sort": {"seconds": 1}},
+            {"$group": {"_id": None, "seconds": {"$push": "$seconds"}, "mean_seconds": {"$avg": "$seconds"}}},
+            {"$project": {"_id": 0, "count": {"$size": "$seconds"}, "mean_seconds": 1, **ranks}},
+        ]
+        rows = await self.collection.aggregate(pipeline).to_list(length=1)
+        result = rows[0] if rows else {"count": 0, "mean_seconds": None, **{key: None for key in ranks}}
+        return {"from_status": from_status, "to_status": to_status, "since": since, **result}
+
+    def start(self):
+        self.buffer.start()
+
+    async def stop(self):
+        """Write out every buffered event"""
+        await self.buffer.stop()
+
+    def stats(self) -> dict:
+        return self.buffer.stats()
+
+
+task_history = TaskHistoryService(WriteBehindBuffer(
+    "task_events",
+    max_items=settings.TASK_HISTORY_FLUSH_SIZE,
+    flush_interval_seconds=settings.TASK_HISTORY_FLUSH_INTERVAL_SECONDS,
+    max_pending=settings.TASK_HISTORY_MAX_PENDING
+))
@@ -1,72 +1,385 @@
-from typing import List
+import csv
+import io
+import json
+import re
+from typing import Any, Dict, List, Optional, Set, Tuple
 from bson import ObjectId
 from datetime import datetime
-from app.core.database import get_database
-from app.schemas.task import TaskCreate
+from pydantic import ValidationError
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+from app.core.batch import (
+    CONFLICT_ERROR, batch_marker, describe_error, parse_object_id, run_bulk_write, unapplied_updates, validate_operations
+)
+from app.core.database import get_collection
+from app.core.pagination import (
+    decode_offset_cursor, encode_cursor, encode_mobile_cursor, encode_offset_cursor, keyset_filter, mobile_keyset_filter
+)
+from app.core.versions import TASKS_VERSION_KEY, version_stamps
+from app.schemas.task import TaskCreate, TaskResponse, TaskUpdate
 from app.schemas.user import UserCreate
 from app.services.user_service import user_service
+from app.services.stats_service import stats_service
+from app.services.task_events import TASK_CREATED, TASK_STATUS_CHANGED, publish_task_event
+from app.services.task_history import task_history
+
+# Exactly the stored fields TaskResponse needs (_id is always returned)
+TASK_RESPONSE_PROJECTION = {field: 1 for field in TaskResponse.model_fields if field != "id"}
+
+# Shorter mobile prefixes match too large a share of customers to sort cheaply
+MOBILE_PREFIX_MIN_LENGTH = 4
 
 
 class TaskService:
-    def __init__(self):
-        self.collection = get_database()["tasks"]
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return get_collection("tasks")
 
-    def create_task(self, task_data: TaskCreate) -> dict:
+    async def create_task(self, task_data: TaskCreate) -> dict:
         """Create a new installation task and register the user"""
         # Create the customer user account
-        user_data = UserCreate(
-            mobile=task_data.mobile,
-            name=task_data.name,
-            password=task_data.initial_password,
-            role="customer",
-            address=task_data.address,
-            plan=task_data.plan
-        )
-
         try:
-            user_service.create_user(user_data)
+            await user_service.create_user(self._build_customer(task_data))
         except ValueError:
             # User already exists, that's okay
             pass
 
-        task_dict = {
-            "name": task_data.name,
-            "mobile": task_data.mobile,
-            "address": task_data.address,
-            "plan": task_data.plan,
-            "status": task_data.status,
-            "created_at": datetime.utcnow()
-        }
+        task_dict = self._build_task(task_data)
 
-        result = self.collection.insert_one(task_dict)
+        result = await self.collection.insert_one(task_dict)
+        await version_stamps.bump(TASKS_VERSION_KEY)
+        await stats_service.record_task_status(None, task_dict["status"])
         task_dict["_id"] = result.inserted_id
+        task_history.record(task_dict)
+        publish_task_event(TASK_CREATED, task_dict)
         return self._format_task(task_dict)
 
-    def get_all_tasks(self) -> List[dict]:
+    async def import_tasks(self, rows: List[Dict[str, Any]], batch_size: int = 1000) -> List[dict]:
+        """Create many installation tasks (and their customer accounts) in bulk
+
+        Rows are validated with TaskCreate; existing customers are resolved with one
+        $in query, new accounts are provisioned in bulk, and tasks are written with
+        chunked unordered insert_many. Returns one result per input row; a row
+        whose insert fails is reported as failed without stopping the others.
+        """
+        results: List[dict] = []
+        valid: List[Tuple[int, TaskCreate]] = []
+        for index, row in enumerate(rows):
+            try:
+                valid.append((index, TaskCreate(**row)))
+                results.append({"row": index, "status": "created"})
+            except (ValidationError, TypeError) as e:
+                results.append({"row": index, "status": "invalid", "error": self._describe_error(e)})
+
+        if not valid:
+            return results
+
+        created_mobiles = await self._provision_customers([task for _, task in valid], batch_size)
+
+        documents = [self._build_task(task) for _, task in valid]
+        failed: Dict[int, str] = {}
+        for start in range(0, len(documents), batch_size):
+            try:
+                await self.collection.insert_many(documents[start:start + batch_size], ordered=False)
+            except BulkWriteError as e:
+                for error in e.details["writeErrors"]:
+                    failed[start + error["index"]] = error.get("errmsg", "Write failed")
+        inserted = [document for position, document in enumerate(documents) if position not in failed]
+        if inserted:
+            await version_stamps.bump(TASKS_VERSION_KEY)
+            await stats_service.rebuild_counters(bills=False)
+            task_history.record_many(inserted)
+            for document in inserted:
+                publish_task_event(TASK_CREATED, document)
+
+        for position, ((index, task), document) in enumerate(zip(valid, documents)):
+            if position in failed:
+                results[index].update(status="failed", error=failed[position])
+            else:
+                results[index]["task_id"] = str(document["_id"])
+            if task.mobile in created_mobiles:
+                results[index]["user_created"] = True
+                # Only the first row for a mobile gets credit for the new account
+                created_mobiles.discard(task.mobile)
+        return results
+
+    async def run_batch(self, operations: List[Any]) -> List[dict]:
+        """Apply many task creates and status updates with one unordered bulk_write
+
+        Each operation is {"op": "create", <TaskCreate fields>} or
+        {"op": "update", "task_id": ..., <TaskUpdate fields>} and is validated on
+        its own. Current statuses are read with one $in query, so counters,
+        history and the event stream see every transition. Returns one result
+        per operation, in order.
+        """
+        results, valid = validate_operations(operations, {
+            "create": lambda fields: TaskCreate(**fields),
+            "update": lambda fields: (parse_object_id(fields.get("task_id"), "task_id"), TaskUpdate(**fields)),
+        })
+        creates = [(index, task) for index, op, task in valid if op == "create"]
+        updates = [(index, *update) for index, op, update in valid if op == "update"]
+
+        current = {}
+        if updates:
+            documents = self.collection.find({"_id": {"$in": [task_id for _, task_id, _ in updates]}}, TASK_RESPONSE_PROJECTION)
+            current = {task["_id"]: task async for task in documents}
+        created_mobiles = await self._provision_customers([task for _, task in creates]) if creates else set()
+
+        requests = []
+        new_tasks = {}
+        for index, task in creates:
+            document = self._build_task(task)
+            document["_id"] = ObjectId()
+            requests.append((index, InsertOne(document)))
+            new_tasks[index] = (task.mobile, document)
+
+        changes = {}
+        seen = set()
+        marker = batch_marker()
+        for index, task_id, update in updates:
+            results[index]["task_id"] = str(task_id)
+            task = current.get(task_id)
+            if task_id in seen:
+                # Unordered writes to one document could land in either order
+                results[index].update(status="invalid", error="task_id: appears more than once in the batch")
+            elif task is None:
+                results[index]["status"] = "not_found"
+            elif task["status"] == update.status:
+                results[index]["status"] = "unchanged"
+            else:
+                # Conditional on the status read above, so a concurrent change is not overwritten or miscounted
+                requests.append((index, UpdateOne(
+                    {"_id": task_id, "status": task["status"]},
+                    {"$set": {"status": update.status, "updated_at": marker}}
+                )))
+                changes[index] = (task, update.status)
+            seen.add(task_id)
+
+        matched, errors = await run_bulk_write(self.collection, requests)
+        for index in errors:
+            results[index].update(status="failed", error=errors[index].get("errmsg", "Write failed"))
+        conflicts = await unapplied_updates(
+            self.collection,
+            {index: task["_id"] for index, (task, _) in changes.items() if index not in errors},
+            matched,
+            marker
+        )
+        for index in conflicts:
+            results[index].update(status="failed", error=CONFLICT_ERROR)
+
+        created = []
+        for index, (mobile, document) in new_tasks.items():
+            if index in errors:
+                continue
+            results[index].update(status="created", task_id=str(document["_id"]))
+            if mobile in created_mobiles:
+                results[index]["user_created"] = True
+                created_mobiles.discard(mobile)
+            created.append(document)
+        changed = []
+        for index, (task, status) in changes.items():
+            if index in errors or index in conflicts:
+                continue
+            results[index]["status"] = "updated"
+            previous_status, task["status"] = task["status"], status
+            changed.append((task, previous_status))
+
+        if created or changed:
+            await version_stamps.bump(TASKS_VERSION_KEY)
+            await stats_service.record_task_transitions(
+                [(None, task["status"]) for task in created] +
+                [(previous_status, task["status"]) for task, previous_status in changed]
+            )
+            task_history.record_many(created)
+            for task, previous_status in changed:
+                task_history.record(task, previous_status)
+            for task in created:
+                publish_task_event(TASK_CREATED, task)
+            for task, _ in changed:
+                publish_task_event(TASK_STATUS_CHANGED, task)
+        return results
+
+    def parse_import_file(self, content: bytes, filename: str) -> List[Dict[str, Any]]:
+        """Parse an uploaded CSV or JSON (array of objects) import file into rows"""
+        try:
+            text = content.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise ValueError("Import file must be UTF-8 encoded")
+
+        if filename.lower().endswith(".csv"):
+            # Blank cells fall back to schema defaults (e.g. status)
+            return [
+                {key: value for key, value in row.items() if key and value not in (None, "")}
+                for row in csv.DictReader(io.StringIO(text))
+            ]
+
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}")
+        if not isinstance(rows, list):
+            raise ValueError("JSON import must be an array of task objects")
+        return rows
+
+    async def get_all_tasks(self) -> List[dict]:
         """Get all installation tasks"""
         tasks = self.collection.find()
-        return [self._format_task(task) for task in tasks]
+        return [self._format_task(task) async for task in tasks]
+
+    async def get_tasks_page(
+        self,
+        status: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None,
+        fields: Optional[List[str]] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Get one page of tasks, newest first, and the cursor for the next page
+
+        Documents are returned as stored (with _id), projected to the response
+        fields, so they can be validated straight into TaskResponse.
+        """
+        query = keyset_filter(cursor)
+        if status:
+            query["status"] = status
+
+        if fields:
+            unknown = set(fields) - set(TaskResponse.model_fields)
+            if unknown:
+                raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}")
+            # created_at is always read because the next cursor is built from it
+            projection = {field: 1 for field in fields if field != "id"}
+            projection["created_at"] = 1
+        else:
+            projection = TASK_RESPONSE_PROJECTION
+
+        documents = self.collection.find(query, projection).sort(
+            [("created_at", -1), ("_id", -1)]
+        ).limit(limit + 1)
+        tasks = await documents.to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = encode_cursor(tasks[-1]["created_at"], tasks[-1]["_id"])
 
-    def get_task_by_id(self, task_id: str) -> dict:
+        if fields and "created_at" not in fields:
+            for task in tasks:
+                del task["created_at"]
+        return tasks, next_cursor
+
+    async def search_tasks(
+        self,
+        text: Optional[str] = None,
+        mobile_prefix: Optional[str] = None,
+        status: Optional[str] = None,
+        limit: int = 50,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Search tasks by words in the name/address and/or a mobile number prefix
+
+        Words are matched case-insensitively through the name_address_text index,
+        as whole words only: "Raj" does not find "Rajesh". Those results come
+        best match first; the cursor is an offset, so deep pages cost more.
+        A mobile prefix alone is an anchored range scan on mobile_id, sorted by
+        mobile number and paginated on it.
+        """
+        if not text and not mobile_prefix:
+            raise ValueError("Provide a search term or a mobile number prefix")
+        if mobile_prefix and len(mobile_prefix) < MOBILE_PREFIX_MIN_LENGTH:
+            raise ValueError(f"Mobile prefix must be at least {MOBILE_PREFIX_MIN_LENGTH} digits")
+
+        if text:
+            # Relevance has no index to walk, so order by it instead of forcing an in-memory date sort
+            offset = decode_offset_cursor(cursor)
+            query = {"$text": {"$search": text}}
+            sort = [("score", {"$meta": "textScore"}), ("_id", 1)]
+        else:
+            query = mobile_keyset_filter(cursor)
+            sort = [("mobile", 1), ("_id", 1)]
+        if mobile_prefix:
+            query["mobile"] = {"$regex": f"^{re.escape(mobile_prefix)}"}
+        if status:
+            query["status"] = status
+
+        documents = self.collection.find(query, TASK_RESPONSE_PROJECTION).sort(sort)
+        if text:
+            documents = documents.skip(offset)
+        tasks = await documents.limit(limit + 1).to_list(length=limit + 1)
+
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = (
+                encode_offset_cursor(offset + limit) if text
+                else encode_mobile_cursor(tasks[-1]["mobile"], tasks[-1]["_id"])
+            )
+        return tasks, next_cursor
+
+    async def get_task_by_id(self, task_id: str) -> dict:
         """Get a task by ID"""
         try:
-            task = self.collection.find_one({"_id": ObjectId(task_id)})
+            task = await self.collection.find_one({"_id": ObjectId(task_id)})
             return self._format_task(task) if task else None
         except:
             return None
 
-    def update_task_status(self, task_id: str, status: str) -> dict:
+    async def update_task_status(self, task_id: str, status: str) -> dict:
         """Update task status"""
         try:
-            result = self.collection.find_one_and_update(
+            # The previous status is needed to move the dashboard counters
+            result = await self.collection.find_one_and_update(
                 {"_id": ObjectId(task_id)},
                 {"$set": {"status": status}},
-                return_document=True
+                return_document=ReturnDocument.BEFORE
             )
+            if result:
+                previous_status, result["status"] = result["status"], status
+                await version_stamps.bump(TASKS_VERSION_KEY)
+                await stats_service.record_task_status(previous_status, status)
+                if previous_status != status:
+                    task_history.record(result, previous_status)
+                publish_task_event(TASK_STATUS_CHANGED, result)
             return self._format_task(result) if result else None
         except:
             return None
 
+    async def _provision_customers(self, tasks: List[TaskCreate], batch_size: int = 1000) -> Set[str]:
+        """Create the missing customer accounts, once per mobile, like create_task does; returns mobiles created"""
+        existing = await user_service.get_existing_mobiles({task.mobile for task in tasks})
+        new_customers = {}
+        for task in tasks:
+            if task.mobile not in existing and task.mobile not in new_customers:
+                new_customers[task.mobile] = self._build_customer(task)
+        return await user_service.create_users_bulk(list(new_customers.values()), batch_size)
+
+    def _build_customer(self, task_data: TaskCreate) -> UserCreate:
+        """Customer account details for the person behind an installation task"""
+        return UserCreate(
+            mobile=task_data.mobile,
+            name=task_data.name,
+            password=task_data.initial_password,
+            role="customer",
+            address=task_data.address,
+            plan=task_data.plan
+        )
+
+    def _build_task(self, task_data: TaskCreate) -> dict:
+        """Build a task document from validated input"""
+        return {
+            "name": task_data.name,
+            "mobile": task_data.mobile,
+            "address": task_data.address,
+            "plan": task_data.plan,
+            "status": task_data.status,
+            "created_at": datetime.utcnow()
+        }
+
+    def _describe_error(self, error: Exception) -> str:
+        if isinstance(error, ValidationError):
+            return describe_error(error)
+        return "Row must be an object"
+
     def _format_task(self, task: dict) -> dict:
         """Format task document from MongoDB"""
         if not task:
@@ -1,60 +1,120 @@
-from typing import Optional
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set
 from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from datetime import datetime
-from app.core.database import get_database
-from app.core.security import get_password_hash, verify_password
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.database import get_collection
+from app.core.cache import user_cache
+from app.core.security import password_hasher
 from app.schemas.user import UserCreate
 
 
 class UserService:
-    def __init__(self):
-        self.collection = get_database()["users"]
+    @property
+    def collection(self) -> AsyncIOMotorCollection:
+        return get_collection("users")
 
-    def create_user(self, user_data: UserCreate) -> dict:
+    async def create_user(self, user_data: UserCreate) -> dict:
         """Create a new user"""
         # Check if user already exists
-        existing_user = self.collection.find_one({"mobile": user_data.mobile})
+        existing_user = await self.collection.find_one({"mobile": user_data.mobile})
         if existing_user:
             raise ValueError("User with this mobile number already exists")
 
-        user_dict = {
-            "mobile": user_data.mobile,
-            "name": user_data.name,
-            "role": user_data.role,
-            "hashed_password": get_password_hash(user_data.password),
-            "address": user_data.address,
-            "plan": user_data.plan,
-            "created_at": datetime.utcnow()
-        }
+        user_dict = self._build_user(user_data, await password_hasher.hash(user_data.password))
 
-        result = self.collection.insert_one(user_dict)
+        try:
+            result = await self.collection.insert_one(user_dict)
+        except DuplicateKeyError:
+            # Lost a race with a concurrent registration (unique index on mobile)
+            raise ValueError("User with this mobile number already exists")
+        user_cache.invalidate(user_data.mobile)
         user_dict["_id"] = result.inserted_id
         return self._format_user(user_dict)
 
-    def get_user_by_mobile(self, mobile: str) -> Optional[dict]:
+    async def create_users_bulk(self, users: List[UserCreate], batch_size: int = 1000) -> Set[str]:
+        """Create many users at once and return the mobiles that were actually inserted
+
+        Passwords are hashed in parallel on the worker pool and users are written with
+        chunked unordered insert_many; mobiles that already exist are skipped.
+        """
+        hashes = await asyncio.gather(*(password_hasher.hash(user.password) for user in users))
+        documents = [self._build_user(user, hashed) for user, hashed in zip(users, hashes)]
+
+        created = set()
+        for start in range(0, len(documents), batch_size):
+            chunk = documents[start:start + batch_size]
+            failed = set()
+            try:
+                await self.collection.insert_many(chunk, ordered=False)
+            except BulkWriteError as e:
+                if any(error["code"] != 11000 for error in e.details["writeErrors"]):
+                    raise
+                failed = {error["index"] for error in e.details["writeErrors"]}
+            created.update(document["mobile"] for index, document in enumerate(chunk) if index not in failed)
+
+        for mobile in created:
+            user_cache.invalidate(mobile)
+        return created
+
+    async def get_existing_mobiles(self, mobiles: Iterable[str]) -> Set[str]:
+        """Return which of the given mobile numbers already have an account (one $in query)"""
+        documents = self.collection.find({"mobile": {"$in": list(mobiles)}}, {"mobile": 1, "_id": 0})
+        return {user["mobile"] async for user in documents}
+
+    async def get_users_by_ids(self, user_ids: Iterable[str]) -> Dict[str, dict]:
+        """Return users keyed by id for the given ids (one $in query); unknown ids are left out"""
+        object_ids = [ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)]
+        documents = self.collection.find({"_id": {"$in": object_ids}}, {"hashed_password": 0})
+        users = {}
+        async for document in documents:
+            user = self._format_user(document)
+            users[user["id"]] = user
+        return users
+
+    async def get_user_by_mobile(self, mobile: str) -> Optional[dict]:
         """Get user by mobile number"""
-        user = self.collection.find_one({"mobile": mobile})
+        user = await self.collection.find_one({"mobile": mobile})
         return self._format_user(user) if user else None
 
-    def get_user_by_id(self, user_id: str) -> Optional[dict]:
+    async def get_user_by_id(self, user_id: str) -> Optional[dict]:
         """Get user by ID"""
         try:
-            user = self.collection.find_one({"_id": ObjectId(user_id)})
+            user = await self.collection.find_one({"_id": ObjectId(user_id)})
             return self._format_user(user) if user else None
         except:
             return None
 
-    def authenticate_user(self, mobile: str, password: str, role: str) -> Optional[dict]:
+    async def authenticate_user(self, mobile: str, password: str, role: str) -> Optional[dict]:
         """Authenticate user with mobile, password and role"""
-        user = self.get_user_by_mobile(mobile)
+        user = await self.get_user_by_mobile(mobile)
         if not user:
             return None
         if user["role"] != role:
             return None
-        if not verify_password(password, user["hashed_password"]):
+        valid, new_hash = await password_hasher.verify_and_update(password, user["hashed_password"])
+        if not valid:
             return None
+        if new_hash:
+            # Bcrypt cost changed since this hash was stored; upgrade it transparently
+            await self.collection.update_one({"_id": ObjectId(user["id"])}, {"$set": {"hashed_password": new_hash}})
+            user_cache.invalidate(mobile)
+            user["hashed_password"] = new_hash
         return user
 
+    def _build_user(self, user_data: UserCreate, hashed_password: str) -> dict:
+        """Build a user document from validated input"""
+        return {
+            "mobile": user_data.mobile,
+            "name": user_data.name,
+            "role": user_data.role,
+            "hashed_password": hashed_password,
+            "address": user_data.address,
+            "plan": user_data.plan,
+            "created_at": datetime.utcnow()
+        }
+
     def _format_user(self, user: dict) -> dict:
         """Format user document from MongoDB"""
         if not user:
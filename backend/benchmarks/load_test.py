@@ -0,0 +1,236 @@
+"""
+Load test for the 4You API
+
+Seeds synthetic data, then drives scripted customer (login -> list bills ->
+pay bill) and engineer (login -> task queue -> search -> status change) workloads
+against the app in-process over ASGI, and reports throughput plus
+p50/p95/p99 latency per endpoint. Results are written as JSON so runs can
+be compared between releases.
+
+Usage (from backend/):
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.load_test --backend memory
+    python -m benchmarks.load_test --backend mongo --mongo-url mongodb://localhost:27017 \\
+        --customers 1000000 --bills-per-customer 12 --tasks 100000 --skip-seed
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+import httpx
+
+from app.core import database
+from app.core.config import settings
+from benchmarks.seed import BENCHMARK_PASSWORD, customer_mobile, engineer_mobile, seed
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not samples:
+        return 0.0
+    index = min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))
+    return samples[index]
+
+
+class Recorder:
+    """Collects per-endpoint latencies and error counts"""
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def call(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await client.request(method, url, **kwargs)
+        self.latencies[name].append(time.perf_counter() - started)
+        if response.status_code >= 400:
+            self.errors[name] += 1
+        return response
+
+    def summary(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name, samples in sorted(self.latencies.items()):
+            samples = sorted(samples)
+            endpoints[name] = {
+                "requests": len(samples),
+                "errors": self.errors[name],
+                "throughput_rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(percentile(samples, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 2),
+            }
+        return endpoints
+
+
+async def login(client, recorder, mobile: str, role: str) -> dict:
+    response = await recorder.call(
+        client, "POST /auth/login", "POST", f"{settings.API_V1_STR}/auth/login",
+        json={"mobile": mobile, "password": BENCHMARK_PASSWORD, "role": role}
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def customer_session(client, recorder, rng: random.Random, customers: int, requests_per_login: int):
+    """Login -> list bills -> pay a due bill, then keep polling bills on the same token"""
+    headers = await login(client, recorder, customer_mobile(rng.randrange(customers)), "customer")
+    for _ in range(requests_per_login):
+        response = await recorder.call(client, "GET /bills", "GET", f"{settings.API_V1_STR}/bills", headers=headers)
+        due = [bill for bill in response.json() if bill["status"] != "Paid"]
+        if due:
+            await recorder.call(
+                client, "PATCH /bills/{id}/pay", "PATCH",
+                f"{settings.API_V1_STR}/bills/{due[0]['id']}/pay", headers=headers
+            )
+
+
+async def engineer_session(client, recorder, rng: random.Random, engineers: int, requests_per_login: int):
+    """Login -> fetch the pending work queue -> look a customer up -> move a task forward"""
+    headers = await login(client, recorder, engineer_mobile(rng.randrange(engineers)), "engineer")
+    for _ in range(requests_per_login):
+        response = await recorder.call(
+            client, "GET /tasks", "GET", f"{settings.API_V1_STR}/tasks",
+            params={"status": "Pending Installation"}, headers=headers
+        )
+        tasks = response.json()
+        if tasks:
+            task = rng.choice(tasks)
+            await recorder.call(
+                client, "GET /tasks/search", "GET", f"{settings.API_V1_STR}/tasks/search",
+                params={"mobile": task["mobile"][:6]}, headers=headers
+            )
+            await recorder.call(
+                client, "PATCH /tasks/{id}/status", "PATCH",
+                f"{settings.API_V1_STR}/tasks/{task['id']}/status",
+                json={"status": "Installation Scheduled"}, headers=headers
+            )
+
+
+async def run_workload(app, args) -> dict:
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    queue: asyncio.Queue = asyncio.Queue()
+    for index in range(args.sessions):
+        queue.put_nowait("engineer" if index % args.engineer_every == 0 else "customer")
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        async def worker():
+            while not queue.empty():
+                kind = queue.get_nowait()
+                if kind == "engineer":
+                    await engineer_session(client, recorder, rng, args.engineers, args.requests_per_login)
+                else:
+                    await customer_session(client, recorder, rng, args.customers, args.requests_per_login)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+        elapsed = time.perf_counter() - started
+
+    total = sum(len(samples) for samples in recorder.latencies.values())
+    return {
+        "elapsed_seconds": round(elapsed, 3),
+        "total_requests": total,
+        "throughput_rps": round(total / elapsed, 1),
+        "endpoints": recorder.summary(elapsed),
+    }
+
+
+def use_memory_backend():
+    """Swap the Motor client for mongomock-motor so no mongod is needed"""
+    from mongomock_motor import AsyncMongoMockClient
+    database.AsyncIOMotorClient = lambda *args, **kwargs: AsyncMongoMockClient()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "unknown"
+
+
+async def main(args):
+    if args.backend == "memory":
+        use_memory_backend()
+    else:
+        settings.MONGODB_URL = args.mongo_url
+    settings.MONGODB_DB_NAME = args.db_name
+    settings.OVERDUE_SWEEP_ENABLED = False
+    # Every simulated session logs in from the same address
+    settings.LOGIN_RATE_LIMIT_ENABLED = False
+
+    # Imported after the backend is chosen so the lifespan connects to it
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        seeded = None
+        if not args.skip_seed:
+            started = time.perf_counter()
+            seeded = await seed(
+                database.get_database(),
+                customers=args.customers,
+                engineers=args.engineers,
+                bills_per_customer=args.bills_per_customer,
+                tasks=args.tasks,
+                batch_size=args.seed_batch_size,
+                seed_value=args.seed
+            )
+            seeded["seconds"] = round(time.perf_counter() - started, 3)
+            print(f"🌱 Seeded {seeded['users']} users, {seeded['bills']} bills, {seeded['tasks']} tasks in {seeded['seconds']}s")
+
+        results = await run_workload(app, args)
+
+    report = {
+        "timestamp": datetime.utcnow().isoformat(),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "backend": args.backend,
+        "parameters": {
+            key: value for key, value in vars(args).items() if key not in ("output",)
+        },
+        "seeded": seeded,
+        **results,
+    }
+
+    print(f"\n{'endpoint':<28}{'reqs':>8}{'rps':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'errors':>8}")
+    for name, stats in report["endpoints"].items():
+        print(
+            f"{name:<28}{stats['requests']:>8}{stats['throughput_rps']:>9}"
+            f"{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}{stats['errors']:>8}"
+        )
+    print(f"\nTotal: {report['total_requests']} requests in {report['elapsed_seconds']}s ({report['throughput_rps']} rps)")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Load test the 4You API in-process")
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--mongo-url", default=settings.MONGODB_URL)
+    parser.add_argument("--db-name", default="4you_benchmark")
+    parser.add_argument("--customers", type=int, default=1000)
+    parser.add_argument("--engineers", type=int, default=10)
+    parser.add_argument("--bills-per-customer", type=int, default=12)
+    parser.add_argument("--tasks", type=int, default=1000)
+    parser.add_argument("--seed-batch-size", type=int, default=5000)
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse data from a previous run")
+    parser.add_argument("--sessions", type=int, default=200, help="Number of scripted login sessions")
+    parser.add_argument("--requests-per-login", type=int, default=5)
+    parser.add_argument("--engineer-every", type=int, default=5, help="Every Nth session is an engineer")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="benchmark-results.json")
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(main(build_parser().parse_args()))
@@ -0,0 +1,119 @@
+"""
+Synthetic data generator for benchmarks
+
+Writes users, bills and tasks with chunked unordered insert_many calls so
+millions of documents can be generated quickly. Every seeded account shares
+one password hash (bcrypt is far too slow to hash a million passwords).
+"""
+import random
+from datetime import datetime, timedelta
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.security import get_password_hash
+
+BENCHMARK_PASSWORD = "benchmark"
+PLANS = ["100 Mbps Standard", "300 Mbps Fiber Blast", "500 Mbps Pro Gamer", "1 Gbps Premium"]
+TASK_STATUSES = ["Pending Installation", "Installation Scheduled", "Completed"]
+LOCALITIES = ["Whitefield", "Indiranagar", "HSR Layout", "Koramangala", "Jayanagar", "Hebbal"]
+
+
+def customer_mobile(index: int) -> str:
+    return f"7{index:09d}"
+
+
+def engineer_mobile(index: int) -> str:
+    return f"6{index:09d}"
+
+
+async def _insert_chunked(collection, documents, batch_size: int) -> int:
+    inserted = 0
+    batch = []
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= batch_size:
+            await collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+
+async def seed(
+    db: AsyncIOMotorDatabase,
+    customers: int,
+    engineers: int,
+    bills_per_customer: int,
+    tasks: int,
+    batch_size: int = 5000,
+    seed_value: int = 42
+) -> dict:
+    """Drop and regenerate users, bills and tasks; returns document counts"""
+    rng = random.Random(seed_value)
+    hashed_password = get_password_hash(BENCHMARK_PASSWORD)
+    now = datetime.utcnow()
+
+    for name in ("users", "bills", "tasks"):
+        await db[name].delete_many({})
+
+    def users():
+        for index in range(customers):
+            yield {
+                "mobile": customer_mobile(index),
+                "name": f"Customer {index}",
+                "role": "customer",
+                "hashed_password": hashed_password,
+                "address": f"House {index}, {rng.choice(LOCALITIES)}, Bengaluru",
+                "plan": rng.choice(PLANS),
+                "created_at": now
+            }
+        for index in range(engineers):
+            yield {
+                "mobile": engineer_mobile(index),
+                "name": f"Engineer {index}",
+                "role": "engineer",
+                "hashed_password": hashed_password,
+                "address": None,
+                "plan": None,
+                "created_at": now
+            }
+
+    user_count = await _insert_chunked(db["users"], users(), batch_size)
+
+    bill_count = 0
+    batch = []
+    customer_ids = db["users"].find({"role": "customer"}, {"_id": 1}).batch_size(batch_size)
+    async for customer in customer_ids:
+        for age in range(bills_per_customer):
+            year, month_index = divmod(now.year * 12 + now.month - 1 - age, 12)
+            month = datetime(year, month_index + 1, 1)
+            batch.append({
+                "user_id": str(customer["_id"]),
+                "month": month.strftime("%B %Y"),
+                "amount": 1179.0,
+                "due_date": (month + timedelta(days=35)).replace(day=5),
+                "status": "Due" if age == 0 else "Paid",
+                "pdf_filename": f"invoice_{month.strftime('%B_%Y').lower()}.pdf",
+                "created_at": month
+            })
+        if len(batch) >= batch_size:
+            await db["bills"].insert_many(batch, ordered=False)
+            bill_count += len(batch)
+            batch = []
+    if batch:
+        await db["bills"].insert_many(batch, ordered=False)
+        bill_count += len(batch)
+
+    def task_documents():
+        for index in range(tasks):
+            yield {
+                "name": f"Prospect {index}",
+                "mobile": f"8{index:09d}",
+                "address": f"Flat {index}, {rng.choice(LOCALITIES)}, Bengaluru",
+                "plan": rng.choice(PLANS),
+                "status": rng.choice(TASK_STATUSES),
+                "created_at": now - timedelta(minutes=index)
+            }
+
+    task_count = await _insert_chunked(db["tasks"], task_documents(), batch_size)
+    return {"users": user_count, "bills": bill_count, "tasks": task_count}
@@ -0,0 +1,103 @@
+"""
+Per-item cost of serializing task and bill lists
+
+Compares the previous response path (format each BSON document into a dict,
+let FastAPI validate it against response_model, dump it to JSON-compatible
+Python and encode with the stdlib json module) with the current one
+(validate BSON documents straight into the response models and let
+pydantic-core emit JSON bytes in one pass).
+
+Usage (from backend/):
+    python -m benchmarks.serialization --items 10000
+"""
+import argparse
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List
+
+from bson import ObjectId
+from pydantic import TypeAdapter
+
+from app.schemas.bill import BillResponse
+from app.schemas.task import TaskResponse
+
+
+def task_documents(count: int) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Prospect {index}",
+            "mobile": f"8{index:09d}",
+            "address": f"Flat {index}, Whitefield, Bengaluru",
+            "plan": "300 Mbps Fiber Blast",
+            "status": "Pending Installation",
+            "created_at": now - timedelta(minutes=index)
+        }
+        for index in range(count)
+    ]
+
+
+def bill_documents(count: int) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "user_id": str(ObjectId()),
+            "month": "November 2024",
+            "amount": 1179.0,
+            "due_date": datetime(2024, 12, 5),
+            "status": "Due",
+            "pdf_filename": "invoice_november_2024.pdf",
+            "created_at": now
+        }
+        for index in range(count)
+    ]
+
+
+def previous_path(adapter: TypeAdapter) -> Callable[[List[dict]], bytes]:
+    def serialize(documents: List[dict]) -> bytes:
+        formatted = []
+        for document in documents:
+            document = dict(document)
+            document["id"] = str(document.pop("_id"))
+            formatted.append(document)
+        validated = adapter.validate_python(formatted)
+        return json.dumps(adapter.dump_python(validated, mode="json")).encode()
+    return serialize
+
+
+def current_path(adapter: TypeAdapter) -> Callable[[List[dict]], bytes]:
+    def serialize(documents: List[dict]) -> bytes:
+        return adapter.dump_json(adapter.validate_python(documents))
+    return serialize
+
+
+def measure(serialize: Callable[[List[dict]], bytes], documents: List[dict], repeat: int) -> float:
+    """Best-of-repeat microseconds per item"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        serialize(documents)
+        best = min(best, time.perf_counter() - started)
+    return best / len(documents) * 1e6
+
+
+def main(args):
+    cases = [
+        ("tasks", TypeAdapter(List[TaskResponse]), task_documents(args.items)),
+        ("bills", TypeAdapter(List[BillResponse]), bill_documents(args.items)),
+    ]
+    print(f"{'payload':<10}{'before µs/item':>16}{'after µs/item':>16}{'speedup':>10}")
+    for name, adapter, documents in cases:
+        before = measure(previous_path(adapter), documents, args.repeat)
+        after = measure(current_path(adapter), documents, args.repeat)
+        print(f"{name:<10}{before:>16.2f}{after:>16.2f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark list serialization per item")
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,135 @@
+"""
+Cold start benchmark for the 4You API
+
+Starts fresh interpreters and measures, for each one, how long importing
+app.main takes, how long the lifespan startup takes, and the latency of the
+first and second login requests (the first one pays any deferred bcrypt/JWT
+loading). Runs with STARTUP_WARMUP off and on, and reports medians so
+changes to import-time work and warm-up can be compared between releases.
+
+Usage (from backend/):
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.startup --runs 5
+    python -m benchmarks.startup --backend mongo --mongo-url mongodb://localhost:27017
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+CHILD_MOBILE = "7000000000"
+CHILD_PASSWORD = "startup-benchmark"
+
+
+async def child(args):
+    """Measure one cold start in this (fresh) interpreter and print the timings as JSON"""
+    started = time.perf_counter()
+    from app.main import app
+    import_seconds = time.perf_counter() - started
+
+    import httpx
+    from app.core import database
+    from app.core.config import settings
+    if args.backend == "memory":
+        from benchmarks.load_test import use_memory_backend
+        use_memory_backend()
+    else:
+        settings.MONGODB_URL = args.mongo_url
+    settings.MONGODB_DB_NAME = args.db_name
+    settings.OVERDUE_SWEEP_ENABLED = False
+    settings.LOGIN_RATE_LIMIT_ENABLED = False
+    settings.STARTUP_WARMUP = args.warmup
+
+    started = time.perf_counter()
+    async with app.router.lifespan_context(app):
+        startup_seconds = time.perf_counter() - started
+
+        # The hash comes from the parent so creating the user loads nothing here
+        await database.get_collection("users").update_one(
+            {"mobile": CHILD_MOBILE},
+            {"$set": {
+                "name": "Startup",
+                "role": "customer",
+                "hashed_password": args.password_hash,
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+
+        latencies = []
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+            for _ in range(2):
+                request_started = time.perf_counter()
+                response = await client.post(
+                    f"{settings.API_V1_STR}/auth/login",
+                    json={"mobile": CHILD_MOBILE, "password": CHILD_PASSWORD, "role": "customer"}
+                )
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - request_started)
+
+    print(json.dumps({
+        "import_seconds": import_seconds,
+        "startup_seconds": startup_seconds,
+        "first_login_ms": latencies[0] * 1000,
+        "second_login_ms": latencies[1] * 1000,
+    }))
+
+
+def run_child(args, warmup: bool, password_hash: str) -> dict:
+    command = [
+        sys.executable, "-m", "benchmarks.startup", "--child",
+        "--backend", args.backend, "--mongo-url", args.mongo_url, "--db-name", args.db_name,
+        "--password-hash", password_hash,
+    ]
+    if warmup:
+        command.append("--warmup")
+    started = time.perf_counter()
+    output = subprocess.run(command, check=True, capture_output=True, text=True, env=os.environ.copy()).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings["process_seconds"] = time.perf_counter() - started
+    return timings
+
+
+def main(args):
+    from app.core.security import get_password_hash
+    password_hash = get_password_hash(CHILD_PASSWORD)
+
+    report = {"backend": args.backend, "runs": args.runs, "python": sys.version.split()[0], "results": {}}
+    metrics = ["process_seconds", "import_seconds", "startup_seconds", "first_login_ms", "second_login_ms"]
+    print(f"{'warm-up':<10}" + "".join(f"{metric:>18}" for metric in metrics))
+    for warmup in (False, True):
+        runs = [run_child(args, warmup, password_hash) for _ in range(args.runs)]
+        medians = {metric: round(statistics.median(run[metric] for run in runs), 4) for metric in metrics}
+        report["results"]["warmup" if warmup else "cold"] = medians
+        print(f"{'on' if warmup else 'off':<10}" + "".join(f"{medians[metric]:>18}" for metric in metrics))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"📄 Results written to {args.output}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark cold start of the 4You API")
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory")
+    parser.add_argument("--mongo-url", default="mongodb://localhost:27017")
+    parser.add_argument("--db-name", default="4you_benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per configuration")
+    parser.add_argument("--output", default="benchmark-results-startup.json")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--warmup", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--password-hash", help=argparse.SUPPRESS)
+    return parser
+
+
+if __name__ == "__main__":
+    arguments = build_parser().parse_args()
+    if arguments.child:
+        asyncio.run(child(arguments))
+    else:
+        main(arguments)
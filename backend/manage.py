@@ -0,0 +1,200 @@
+"""
+Management commands for the 4You backend
+
+Usage:
+    python manage.py indexes apply
+    python manage.py indexes report
+    python manage.py indexes duplicates
+    python manage.py billing run [--month YYYY-MM] [--batch-size N] [--prerender]
+    python manage.py billing prerender-invoices [--month YYYY-MM] [--batch-size N]
+    python manage.py billing sweep-overdue [--batch-size N]
+    python manage.py billing migrate-due-dates [--batch-size N]
+    python manage.py billing archive [--older-than-days N] [--batch-size N]
+    python manage.py tasks import FILE [--batch-size N]
+    python manage.py stats rebuild-counters
+"""
+import argparse
+import asyncio
+from datetime import date, datetime
+
+from app.core.config import settings
+from app.core.database import connect_to_mongo, close_mongo_connection
+from app.core.indexes import drop_obsolete_indexes, duplicate_keys, ensure_indexes, index_report
+from app.services.bill_service import bill_service
+from app.services.invoice_service import invoice_service
+from app.services.stats_service import stats_service
+from app.services.task_history import task_history
+from app.services.task_service import task_service
+
+
+async def indexes_apply(args):
+    """Apply the index registry ahead of a deploy and drop indexes it no longer declares"""
+    created = await ensure_indexes()
+    for collection_name, names in created.items():
+        print(f"✅ {collection_name}: {', '.join(names)}")
+    dropped = await drop_obsolete_indexes()
+    for collection_name, names in dropped.items():
+        print(f"🗑️  {collection_name}: dropped {', '.join(names)}")
+
+
+async def indexes_report(args):
+    """Print missing and unused indexes per collection"""
+    report = await index_report()
+    for collection_name, entry in report.items():
+        missing = ", ".join(entry["missing"]) or "-"
+        obsolete = ", ".join(entry["obsolete"]) or "-"
+        unused = ", ".join(entry["unused"]) or "-"
+        print(f"{collection_name}: missing={missing} obsolete={obsolete} unused={unused}")
+
+
+async def indexes_duplicates(args):
+    """List documents that block a unique index from being built"""
+    duplicates = await duplicate_keys()
+    if not duplicates:
+        print("✅ No duplicate keys for any unique index")
+        return
+    for index_name, rows in duplicates.items():
+        print(f"⚠️  {index_name}: {len(rows)} duplicated key(s)")
+        for row in rows:
+            print(f"   {row['key']} x{row['count']}: {', '.join(row['ids'])}")
+
+
+async def billing_run(args):
+    """Generate a month's bills for every customer"""
+    billing_month = datetime.strptime(args.month, "%Y-%m").date() if args.month else date.today()
+    # The registry's unique (user_id, month) index is what makes re-runs safe
+    await ensure_indexes()
+    try:
+        stats = await bill_service.run_monthly_billing(billing_month.year, billing_month.month, args.batch_size)
+    except ValueError as e:
+        print(f"❌ {e}")
+        raise SystemExit(1)
+    print(
+        f"✅ {stats['month']}: {stats['created']} created, {stats['existing']} already billed, "
+        f"{stats['unpriced']} without a priced plan ({stats['customers']} customers) "
+        f"in {stats['seconds']}s, {stats['bills_per_sec']} bills/sec"
+    )
+    if args.prerender:
+        await prerender_invoices(stats["month"], args.batch_size)
+
+
+async def billing_prerender_invoices(args):
+    """Render a month's invoices into the invoice cache ahead of the download spike"""
+    billing_month = datetime.strptime(args.month, "%Y-%m").date() if args.month else date.today()
+    await prerender_invoices(billing_month.strftime("%B %Y"), args.batch_size)
+
+
+async def prerender_invoices(month: str, batch_size: int):
+    try:
+        stats = await invoice_service.prerender_month(month, batch_size=batch_size)
+    finally:
+        invoice_service.shutdown()
+    print(
+        f"✅ {stats['month']} invoices: {stats['rendered']} rendered, {stats['cached']} already cached, "
+        f"{stats['skipped']} without a customer ({stats['bills']} bills) in {stats['seconds']}s"
+    )
+
+
+async def billing_sweep_overdue(args):
+    """Mark every past-due bill as Overdue once"""
+    stats = await bill_service.mark_overdue(batch_size=args.batch_size)
+    print(f"✅ {stats['updated']} bills marked Overdue in {stats['batches']} batches, {stats['seconds']}s")
+
+
+async def billing_migrate_due_dates(args):
+    """Convert string due dates to BSON dates so the sweeper can use the index"""
+    migrated = await bill_service.migrate_due_dates(batch_size=args.batch_size)
+    print(f"✅ Migrated {migrated} bills")
+
+
+async def billing_archive(args):
+    """Move old Paid bills into the bills_archive collection"""
+    stats = await bill_service.archive_paid_bills(args.older_than_days, batch_size=args.batch_size)
+    print(f"✅ {stats['archived']} bills created before {stats['cutoff']} archived in {stats['batches']} batches, {stats['seconds']}s")
+
+
+async def tasks_import(args):
+    """Bulk import installation tasks from a CSV or JSON file"""
+    with open(args.file, "rb") as f:
+        rows = task_service.parse_import_file(f.read(), args.file)
+    results = await task_service.import_tasks(rows, batch_size=args.batch_size)
+
+    created = [result for result in results if result["status"] == "created"]
+    accounts = sum(1 for result in created if result.get("user_created"))
+    print(f"✅ Imported {len(created)} of {len(results)} tasks ({accounts} new customer accounts)")
+    for result in results:
+        if result["status"] != "created":
+            print(f"   row {result['row']}: {result['error']}")
+
+
+async def stats_rebuild_counters(args):
+    """Recompute the dashboard counters from the tasks and bills collections"""
+    if not settings.STATS_USE_COUNTERS:
+        print("ℹ️  STATS_USE_COUNTERS is disabled; the dashboard aggregates on demand")
+        return
+    await stats_service.rebuild_counters()
+    print("✅ Dashboard counters rebuilt")
+
+
+async def run(args):
+    await connect_to_mongo()
+    try:
+        await args.handler(args)
+    finally:
+        # Imports queue task history events; write them before exiting
+        await task_history.stop()
+        await close_mongo_connection()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="4You backend management commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    indexes = commands.add_parser("indexes", help="Manage MongoDB indexes")
+    indexes_commands = indexes.add_subparsers(dest="action", required=True)
+    indexes_commands.add_parser("apply", help="Create all registered indexes and drop obsolete ones").set_defaults(handler=indexes_apply)
+    indexes_commands.add_parser("report", help="Show missing and unused indexes").set_defaults(handler=indexes_report)
+    indexes_commands.add_parser(
+        "duplicates", help="List duplicate keys that block unique indexes"
+    ).set_defaults(handler=indexes_duplicates)
+
+    billing = commands.add_parser("billing", help="Billing jobs")
+    billing_commands = billing.add_subparsers(dest="action", required=True)
+    billing_run_parser = billing_commands.add_parser("run", help="Generate monthly bills for all customers")
+    billing_run_parser.add_argument("--month", help="Billing month as YYYY-MM (default: current month)")
+    billing_run_parser.add_argument("--batch-size", type=int, default=settings.BILLING_BATCH_SIZE)
+    billing_run_parser.add_argument("--prerender", action="store_true", help="Render the month's invoices afterwards")
+    billing_run_parser.set_defaults(handler=billing_run)
+    prerender_parser = billing_commands.add_parser("prerender-invoices", help="Warm the invoice PDF cache for a month")
+    prerender_parser.add_argument("--month", help="Billing month as YYYY-MM (default: current month)")
+    prerender_parser.add_argument("--batch-size", type=int, default=settings.EXPORT_BATCH_SIZE)
+    prerender_parser.set_defaults(handler=billing_prerender_invoices)
+    sweep_parser = billing_commands.add_parser("sweep-overdue", help="Mark past-due bills as Overdue")
+    sweep_parser.add_argument("--batch-size", type=int, default=settings.OVERDUE_SWEEP_BATCH_SIZE)
+    sweep_parser.set_defaults(handler=billing_sweep_overdue)
+    migrate_parser = billing_commands.add_parser("migrate-due-dates", help="Convert string due dates to dates")
+    migrate_parser.add_argument("--batch-size", type=int, default=settings.OVERDUE_SWEEP_BATCH_SIZE)
+    migrate_parser.set_defaults(handler=billing_migrate_due_dates)
+    archive_parser = billing_commands.add_parser("archive", help="Archive Paid bills past the archive horizon")
+    archive_parser.add_argument("--older-than-days", type=int, default=settings.BILL_ARCHIVE_AFTER_DAYS)
+    archive_parser.add_argument("--batch-size", type=int, default=settings.BILL_ARCHIVE_BATCH_SIZE)
+    archive_parser.set_defaults(handler=billing_archive)
+
+    tasks = commands.add_parser("tasks", help="Installation task jobs")
+    tasks_commands = tasks.add_subparsers(dest="action", required=True)
+    import_parser = tasks_commands.add_parser("import", help="Bulk import tasks from CSV or JSON")
+    import_parser.add_argument("file", help="Path to a .csv file or a JSON array of tasks")
+    import_parser.add_argument("--batch-size", type=int, default=settings.IMPORT_BATCH_SIZE)
+    import_parser.set_defaults(handler=tasks_import)
+
+    stats = commands.add_parser("stats", help="Dashboard statistics")
+    stats_commands = stats.add_subparsers(dest="action", required=True)
+    stats_commands.add_parser(
+        "rebuild-counters", help="Recompute pre-aggregated dashboard counters"
+    ).set_defaults(handler=stats_rebuild_counters)
+
+    return parser
+
+
+if __name__ == "__main__":
+    asyncio.run(run(build_parser().parse_args()))
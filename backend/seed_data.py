@@ -4,28 +4,29 @@ Run this script after setting up MongoDB
 """
 import sys
 import os
+import asyncio
 from datetime import datetime
 
 # Add the app directory to the path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
 
-from app.core.database import connect_to_mongo, get_database
+from app.core.database import connect_to_mongo, close_mongo_connection, get_database
 from app.core.security import get_password_hash
 
 
-def seed_data():
+async def seed_data():
     """Seed the database with test data"""
     print("🌱 Starting database seeding...")
 
     # Connect to MongoDB
-    connect_to_mongo()
+    await connect_to_mongo()
     db = get_database()
 
     # Clear existing data (optional - comment out if you want to keep existing data)
     print("🗑️  Clearing existing data...")
-    db["users"].delete_many({})
-    db["bills"].delete_many({})
-    db["tasks"].delete_many({})
+    await db["users"].delete_many({})
+    await db["bills"].delete_many({})
+    await db["tasks"].delete_many({})
 
     # Create test users
     print("👤 Creating test users...")
@@ -40,7 +41,7 @@ def seed_data():
         "plan": "300 Mbps Fiber Blast",
         "created_at": datetime.utcnow()
     }
-    customer_result = db["users"].insert_one(customer_user)
+    customer_result = await db["users"].insert_one(customer_user)
     customer_id = str(customer_result.inserted_id)
     print(f"✅ Created customer: {customer_user['name']} (mobile: {customer_user['mobile']}, password: password)")
 
@@ -54,7 +55,7 @@ def seed_data():
         "plan": None,
         "created_at": datetime.utcnow()
     }
-    db["users"].insert_one(engineer_user)
+    await db["users"].insert_one(engineer_user)
     print(f"✅ Created engineer: {engineer_user['name']} (mobile: {engineer_user['mobile']}, password: engineer)")
 
     # Create test bills for the customer
@@ -64,7 +65,7 @@ def seed_data():
             "user_id": customer_id,
             "month": "November 2024",
             "amount": 1179.00,
-            "due_date": "2024-12-05",
+            "due_date": datetime(2024, 12, 5),
             "status": "Overdue",
             "pdf_filename": "invoice_november_2024.pdf",
             "created_at": datetime.utcnow()
@@ -73,7 +74,7 @@ def seed_data():
             "user_id": customer_id,
             "month": "October 2024",
             "amount": 1179.00,
-            "due_date": "2024-11-05",
+            "due_date": datetime(2024, 11, 5),
             "status": "Paid",
             "pdf_filename": "invoice_october_2024.pdf",
             "created_at": datetime.utcnow()
@@ -82,7 +83,7 @@ def seed_data():
             "user_id": customer_id,
             "month": "September 2024",
             "amount": 1179.00,
-            "due_date": "2024-10-05",
+            "due_date": datetime(2024, 10, 5),
             "status": "Paid",
             "pdf_filename": "invoice_september_2024.pdf",
             "created_at": datetime.utcnow()
@@ -91,13 +92,13 @@ def seed_data():
             "user_id": customer_id,
             "month": "August 2024",
             "amount": 1179.00,
-            "due_date": "2024-09-05",
+            "due_date": datetime(2024, 9, 5),
             "status": "Paid",
             "pdf_filename": "invoice_august_2024.pdf",
             "created_at": datetime.utcnow()
         }
     ]
-    db["bills"].insert_many(bills)
+    await db["bills"].insert_many(bills)
     print(f"✅ Created {len(bills)} bills for customer")
 
     # Create sample tasks (installations)
@@ -120,7 +121,7 @@ def seed_data():
             "created_at": datetime.utcnow()
         }
     ]
-    db["tasks"].insert_many(tasks)
+    await db["tasks"].insert_many(tasks)
     print(f"✅ Created {len(tasks)} installation tasks")
 
     print("\n🎉 Database seeding completed successfully!")
@@ -133,6 +134,8 @@ def seed_data():
     print("   - Password: engineer")
     print("\n🚀 You can now start the backend server!")
 
+    await close_mongo_connection()
+
 
 if __name__ == "__main__":
-    seed_data()
+    asyncio.run(seed_data())
@@ -0,0 +1,38 @@
+import asyncio
+from starlette.requests import Request
+from app.core.config import settings
+from app.core.rate_limit import LoginGuard, MemoryRateLimitBackend, client_ip
+
+
+def make_request(peer: str, forwarded_for: str = None) -> Request:
+    headers = [(b"x-forwarded-for", forwarded_for.encode())] if forwarded_for else []
+    return Request({"type": "http", "method": "POST", "path": "/", "headers": headers, "client": (peer, 1234)})
+
+
+def test_forwarded_for_ignored_without_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_COUNT", 0)
+    assert client_ip(make_request("10.0.0.1", "203.0.113.7")) == "10.0.0.1"
+
+
+def test_client_is_the_entry_added_by_the_trusted_proxy(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_COUNT", 1)
+    # The left entry was sent by the client and could be forged
+    assert client_ip(make_request("10.0.0.1", "198.51.100.9, 203.0.113.7")) == "203.0.113.7"
+    assert client_ip(make_request("10.0.0.1")) == "10.0.0.1"
+
+
+def test_forwarded_clients_get_separate_ip_buckets(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXY_COUNT", 1)
+    monkeypatch.setattr(settings, "LOGIN_RATE_LIMIT_ENABLED", True)
+    guard = LoginGuard(MemoryRateLimitBackend(maxsize=1000))
+    first = client_ip(make_request("10.0.0.1", "203.0.113.7"))
+    second = client_ip(make_request("10.0.0.1", "203.0.113.8"))
+
+    async def attempts():
+        # A different mobile each time so only the per-IP bucket can run out
+        waits = [await guard.check(f"90000{i:05d}", first) for i in range(settings.LOGIN_RATE_IP_CAPACITY + 1)]
+        return waits, await guard.check("9100000000", second)
+
+    waits, other = asyncio.run(attempts())
+    assert not any(waits[:-1]) and waits[-1] > 0
+    assert other == 0
@@ -24,24 +24,71 @@ import {
 
 // --- API CONFIGURATION ---
 const API_BASE_URL = 'http://localhost:8000/api';
+// Items per list request; further pages are loaded on demand
+const PAGE_SIZE = 50;
+const TASK_STATUSES = ['Pending Installation', 'Installation Scheduled', 'Completed'];
 
 // --- API SERVICE ---
 class APIService {
   constructor() {
     this.token = localStorage.getItem('token');
+    this.refreshToken = localStorage.getItem('refreshToken');
   }
 
-  setToken(token) {
+  setToken(token, refreshToken) {
     this.token = token;
     localStorage.setItem('token', token);
+    if (refreshToken) {
+      this.refreshToken = refreshToken;
+      localStorage.setItem('refreshToken', refreshToken);
+    }
   }
 
   clearToken() {
     this.token = null;
+    this.refreshToken = null;
     localStorage.removeItem('token');
+    localStorage.removeItem('refreshToken');
+  }
+
+  // Access tokens are short-lived; trade the refresh token for a new pair.
+  // A refresh token works only once, so concurrent 401s share one refresh.
+  refreshSession() {
+    if (!this.refreshing) {
+      this.refreshing = this.doRefresh().finally(() => { this.refreshing = null; });
+    }
+    return this.refreshing;
+  }
+
+  async doRefresh() {
+    // Another tab may have rotated the token already
+    const refreshToken = localStorage.getItem('refreshToken') || this.refreshToken;
+    if (!refreshToken) return false;
+    const response = await fetch(`${API_BASE_URL}/auth/refresh`, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body: JSON.stringify({ refresh_token: refreshToken }),
+    });
+    if (!response.ok) return false;
+    const data = await response.json();
+    this.setToken(data.access_token, data.refresh_token);
+    return true;
   }
 
   async request(endpoint, options = {}) {
+    const { data } = await this.send(endpoint, options);
+    return data;
+  }
+
+  // One page of a list endpoint plus the cursor for the next one (null on the last page).
+  // Unchanged pages are revalidated by the browser cache through the ETag (304).
+  async requestPage(endpoint, cursor = null) {
+    const page = cursor ? `${endpoint}&cursor=${encodeURIComponent(cursor)}` : endpoint;
+    const { data, headers } = await this.send(page);
+    return { items: data, nextCursor: headers.get('X-Next-Cursor') };
+  }
+
+  async send(endpoint, options = {}, retried = false) {
     const headers = {
       'Content-Type': 'application/json',
       ...options.headers,
@@ -60,6 +107,9 @@ class APIService {
       const response = await fetch(`${API_BASE_URL}${endpoint}`, config);
 
       if (response.status === 401) {
+        if (!retried && await this.refreshSession()) {
+          return this.send(endpoint, options, true);
+        }
         this.clearToken();
         throw new Error('Session expired. Please login again.');
       }
@@ -70,7 +120,7 @@ class APIService {
         throw new Error(data.detail || 'Something went wrong');
       }
 
-      return data;
+      return { data, headers: response.headers };
     } catch (error) {
       throw error;
     }
@@ -82,10 +132,20 @@ class APIService {
       method: 'POST',
       body: JSON.stringify({ mobile, password, role }),
     });
-    this.setToken(data.access_token);
+    this.setToken(data.access_token, data.refresh_token);
     return data;
   }
 
+  async logout() {
+    if (this.token) {
+      await fetch(`${API_BASE_URL}/auth/logout`, {
+        method: 'POST',
+        headers: { Authorization: `Bearer ${this.token}` },
+      }).catch(() => {});
+    }
+    this.clearToken();
+  }
+
   async register(userData) {
     return this.request('/auth/register', {
       method: 'POST',
@@ -98,8 +158,8 @@ class APIService {
   }
 
   // Bill endpoints
-  async getBills() {
-    return this.request('/bills');
+  async getBills(cursor = null) {
+    return this.requestPage(`/bills?limit=${PAGE_SIZE}`, cursor);
   }
 
   async payBill(billId) {
@@ -109,8 +169,8 @@ class APIService {
   }
 
   // Task endpoints
-  async getTasks() {
-    return this.request('/tasks');
+  async getTasks(status, cursor = null) {
+    return this.requestPage(`/tasks?status=${encodeURIComponent(status)}&limit=${PAGE_SIZE}`, cursor);
   }
 
   async createTask(taskData) {
@@ -369,7 +429,7 @@ const EngineerDashboard = ({ showNotification, onNewCustomerAdded }) => {
 
 
 // 3. Engineer Tasks/List Component
-const EngineerTasks = ({ showNotification, tasks, onTasksUpdate }) => {
+const EngineerTasks = ({ showNotification, tasks, taskCursors, onTaskUpdated, onLoadMore }) => {
   const [loading, setLoading] = useState(false);
 
   const TaskStatusBadge = ({ status }) => {
@@ -388,12 +448,9 @@ const EngineerTasks = ({ showNotification, tasks, onTasksUpdate }) => {
   const handleUpdateStatus = async (task, newStatus) => {
     setLoading(true);
     try {
-      await api.updateTaskStatus(task.id, newStatus);
+      const updatedTask = await api.updateTaskStatus(task.id, newStatus);
       showNotification(`Task for ${task.name} updated to ${newStatus}!`, 'success');
-
-      // Refresh tasks
-      const updatedTasks = await api.getTasks();
-      onTasksUpdate(updatedTasks);
+      onTaskUpdated(updatedTask);
     } catch (error) {
       showNotification(error.message || 'Failed to update status', 'error');
     } finally {
@@ -404,6 +461,30 @@ const EngineerTasks = ({ showNotification, tasks, onTasksUpdate }) => {
   const sortedTasks = [...tasks].sort((a, b) => new Date(b.created_at) - new Date(a.created_at));
   const pendingTasks = sortedTasks.filter(u => u.status !== 'Completed');
   const completedTasks = sortedTasks.filter(u => u.status === 'Completed');
+  const openStatuses = ['Pending Installation', 'Installation Scheduled'];
+  const morePending = openStatuses.some(s => taskCursors[s]);
+  const moreCompleted = Boolean(taskCursors['Completed']);
+
+  const handleLoadMore = async (statuses) => {
+    setLoading(true);
+    try {
+      await onLoadMore(statuses);
+    } finally {
+      setLoading(false);
+    }
+  };
+
+  const LoadMoreButton = ({ statuses }) => (
+    <div className="p-4 text-center">
+      <button
+        onClick={() => handleLoadMore(statuses)}
+        disabled={loading}
+        className="px-4 py-2 text-sm text-orange-600 hover:text-orange-800 font-medium disabled:opacity-50"
+      >
+        Load more
+      </button>
+    </div>
+  );
 
   
   return (
@@ -457,6 +538,7 @@ const EngineerTasks = ({ showNotification, tasks, onTasksUpdate }) => {
             </div>
           ))
         )}
+        {morePending && <LoadMoreButton statuses={openStatuses} />}
       </div>
 
       {/* Completed Tasks List */}
@@ -475,6 +557,7 @@ const EngineerTasks = ({ showNotification, tasks, onTasksUpdate }) => {
             </div>
           ))
         )}
+        {moreCompleted && <LoadMoreButton statuses={['Completed']} />}
       </div>
     </div>
   );
@@ -489,7 +572,9 @@ const App = () => {
   const [currentView, setCurrentView] = useState('dashboard');
   const [mobileMenuOpen, setMobileMenuOpen] = useState(false);
   const [bills, setBills] = useState([]);
+  const [billsCursor, setBillsCursor] = useState(null);
   const [tasks, setTasks] = useState([]);
+  const [taskCursors, setTaskCursors] = useState({});
   const [paymentModalOpen, setPaymentModalOpen] = useState(false);
   const [selectedBill, setSelectedBill] = useState(null);
   const [notification, setNotification] = useState(null);
@@ -540,19 +625,48 @@ const App = () => {
     }
   }, [isAuthenticated, userRole]);
 
+  // Newest bills first; older ones (and archived years) are loaded on demand
   const loadBills = async () => {
     try {
-      const fetchedBills = await api.getBills();
-      setBills(fetchedBills);
+      const page = await api.getBills();
+      setBills(page.items);
+      setBillsCursor(page.nextCursor);
+    } catch (error) {
+      showNotification('Failed to load bills', 'error');
+    }
+  };
+
+  const loadMoreBills = async () => {
+    try {
+      const page = await api.getBills(billsCursor);
+      setBills(prev => [...prev, ...page.items]);
+      setBillsCursor(page.nextCursor);
     } catch (error) {
       showNotification('Failed to load bills', 'error');
     }
   };
 
+  // The first page of each status queue; older tasks are loaded on demand
   const loadTasks = async () => {
     try {
-      const fetchedTasks = await api.getTasks();
-      setTasks(fetchedTasks);
+      const pages = await Promise.all(TASK_STATUSES.map(status => api.getTasks(status)));
+      setTasks(pages.flatMap(page => page.items));
+      setTaskCursors(Object.fromEntries(TASK_STATUSES.map((status, i) => [status, pages[i].nextCursor])));
+    } catch (error) {
+      showNotification('Failed to load tasks', 'error');
+    }
+  };
+
+  const loadMoreTasks = async (statuses) => {
+    const pending = statuses.filter(status => taskCursors[status]);
+    try {
+      const pages = await Promise.all(pending.map(status => api.getTasks(status, taskCursors[status])));
+      setTasks(prev => {
+        // A task that changed status since the first page may show up again
+        const seen = new Set(prev.map(task => task.id));
+        return [...prev, ...pages.flatMap(page => page.items).filter(task => !seen.has(task.id))];
+      });
+      setTaskCursors(prev => ({ ...prev, ...Object.fromEntries(pending.map((status, i) => [status, pages[i].nextCursor])) }));
     } catch (error) {
       showNotification('Failed to load tasks', 'error');
     }
@@ -562,8 +676,8 @@ const App = () => {
     setTasks(prev => [newTask, ...prev]);
   }, []);
 
-  const handleTasksUpdate = useCallback((updatedTasks) => {
-    setTasks(updatedTasks);
+  const handleTaskUpdated = useCallback((updatedTask) => {
+    setTasks(prev => prev.map(task => (task.id === updatedTask.id ? updatedTask : task)));
   }, []);
 
 
@@ -600,11 +714,13 @@ const App = () => {
   };
 
   const handleLogout = () => {
-    api.clearToken();
+    api.logout();
     setIsAuthenticated(false);
     setUserData(null);
     setBills([]);
+    setBillsCursor(null);
     setTasks([]);
+    setTaskCursors({});
     setCurrentView('dashboard');
   };
 
@@ -762,7 +878,9 @@ const App = () => {
                 <EngineerTasks
                   showNotification={showNotification}
                   tasks={tasks}
-                  onTasksUpdate={handleTasksUpdate}
+                  taskCursors={taskCursors}
+                  onTaskUpdated={handleTaskUpdated}
+                  onLoadMore={loadMoreTasks}
                 />
               )}
             </>
@@ -911,6 +1029,16 @@ const App = () => {
                     </tbody>
                   </table>
                 </div>
+                {billsCursor && (
+                  <div className="p-4 text-center border-t border-gray-100">
+                    <button
+                      onClick={loadMoreBills}
+                      className="px-4 py-2 text-sm text-orange-600 hover:text-orange-800 font-medium"
+                    >
+                      Load older bills
+                    </button>
+                  </div>
+                )}
               </div>
             </div>
           )}